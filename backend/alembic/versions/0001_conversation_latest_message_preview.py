@@ -0,0 +1,45 @@
+"""Add conversations.latest_message_preview
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_tables() at startup may already have added the column (fresh databases, or
+    # deployments that started the app before migrating), so only add it when missing
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('conversations')}
+    if 'latest_message_preview' not in columns:
+        op.add_column('conversations', sa.Column('latest_message_preview', sa.String(length=103), nullable=True))
+    
+    # Backfill from each conversation's most recent message
+    op.execute("""
+        UPDATE conversations AS c
+        SET latest_message_preview = (
+            SELECT CASE WHEN length(m.content) > 100 THEN left(m.content, 100) || '...' ELSE m.content END
+            FROM messages AS m
+            WHERE m.conversation_id = c.id
+            ORDER BY m.created_at DESC
+            LIMIT 1
+        )
+        WHERE c.latest_message_preview IS NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('conversations', 'latest_message_preview')
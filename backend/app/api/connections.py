@@ -92,15 +92,10 @@ async def retest_connection(
 ):
     """Retest an existing connection using stored credentials"""
     try:
-        # Verify user owns connection
-        connection = await connection_service.get_user_connection(db, current_user.id, connection_id)
-        if not connection:
-            raise HTTPException(status_code=404, detail="Connection not found or access denied")
-        
-        # Get full connection details from database
-        full_connection = await connection_service.get_connection_by_id(db, connection_id)
+        # Load full connection details, verifying the user owns it
+        full_connection = await connection_service.get_user_connection_full(db, current_user.id, connection_id)
         if not full_connection:
-            raise HTTPException(status_code=404, detail="Connection not found")
+            raise HTTPException(status_code=404, detail="Connection not found or access denied")
         
         # Create connection data using stored credentials
         connection_data = ConnectionCreate(
@@ -328,8 +323,8 @@ async def delete_connection(
         success = await connection_service.delete_user_connection(db, user_id, connection_id)
         
         if success:
-            # Clean up uploaded files
-            file_handler.cleanup_connection_files(connection_id)
+            # Clean up uploaded files; the directory is renamed aside and deleted in the background
+            await file_handler.cleanup_connection_files(connection_id)
             
             return ConnectionDeleteResponse(
                 success=True,
@@ -10,6 +10,7 @@ from app.core.sse_manager import sse_manager
 from app.services.event_service import event_service
 from app.services.vanna_service import vanna_service
 from app.services.connection_service import connection_service
+from app.utils.file_handler import file_handler
 from app.models.database import User
 from app.config import settings
 
@@ -427,13 +428,11 @@ def _get_directory_size(directory_path: str) -> float:
             return 0.0
         
         total_size = 0
-        for dirpath, dirnames, filenames in os.walk(directory_path):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                try:
-                    total_size += os.path.getsize(filepath)
-                except (OSError, FileNotFoundError):
-                    pass
+        for entry in file_handler.iter_files(directory_path):
+            try:
+                total_size += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
         
         return round(total_size / (1024 * 1024), 2)  # Convert to MB
         
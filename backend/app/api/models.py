@@ -18,6 +18,7 @@ from app.models.schemas import (
     ModelStatus, ModelStatusUpdateRequest, ModelStatusUpdateResponse
 )
 from app.services.model_service import ModelService
+from app.utils.file_handler import file_handler
 from app.models.database import User
 import logging
 logger = logging.getLogger(__name__)
@@ -298,18 +299,25 @@ async def download_model(
         if model.status != "trained":
             raise HTTPException(status_code=400, detail="Model must be trained before downloading")
         
-        # Use the correct path from vanna service
-        model_dir = f"/app/chroma_db/models/{model_id}"
+        # Resolve the trained store from the vanna service's in-memory index rather than a
+        # hardcoded path, so CHROMADB_BASE_PATH is honoured and no lookup touches the disk
+        from app.services.vanna_service import vanna_service
+        model_dir = vanna_service.get_trained_store_path(str(model_id))
         
-        # Debug logging
+        # Debug logging (one directory read serves both the log and the emptiness check)
         logger.info(f"Checking model directory: {model_dir}")
-        logger.info(f"Directory exists: {os.path.exists(model_dir)}")
-        if os.path.exists(model_dir):
-            logger.info(f"Directory contents: {os.listdir(model_dir)}")
+        model_dir_contents = []
+        if model_dir:
+            try:
+                with os.scandir(model_dir) as entries:
+                    model_dir_contents = [entry.name for entry in entries]
+                logger.info(f"Directory contents: {model_dir_contents}")
+            except FileNotFoundError:
+                logger.info(f"Directory does not exist: {model_dir}")
         # Create a temporary directory for the ZIP file
         temp_dir = tempfile.mkdtemp()
         zip_path = os.path.join(temp_dir, f"{model.name}_model.zip")
-        if not os.path.exists(model_dir) or not os.listdir(model_dir):
+        if not model_dir_contents:
             # Create a ZIP with a helpful message
             with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                 zipf.writestr("README.txt", f"""Model Download - {model.name}
@@ -344,12 +352,11 @@ Searched for model files at: {model_dir}
         
         try:
             with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Add model files from the found directory
-                for root, dirs, files in os.walk(model_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, model_dir)
-                        zipf.write(file_path, arcname)
+                # Add model files from the found directory. scandir builds every entry path
+                # as "<model_dir>/<...>", so the archive name is a slice, not a relpath call
+                prefix_length = len(os.path.join(model_dir, ""))
+                for entry in file_handler.iter_files(model_dir):
+                    zipf.write(entry.path, entry.path[prefix_length:])
             
             # Return the ZIP file
             return FileResponse(
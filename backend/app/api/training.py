@@ -522,72 +522,65 @@ async def generate_all_descriptions_sse(
             }
             
             generated_count = 0
-            processed_tables = 0
             all_generated_descriptions = {}
             
-            # Process each table
-            for table_info in tracked_tables:
+            # Get connection for database access
+            model = await training_service._get_model_and_verify_ownership(db, str(model_id), current_user)
+            if not model:
+                raise ValueError(f"Model {model_id} not found or access denied")
+            from app.services.connection_service import connection_service
+            connection = await connection_service.get_connection_by_id(db, str(model.connection_id))
+            
+            # Get tracked columns for every table, then generate descriptions concurrently
+            table_columns = await training_service._get_tracked_columns_by_table(db, str(model_id), tracked_tables)
+            processed_tables = total_tables - len(table_columns)
+            
+            yield {
+                "event": "progress",
+                "data": json.dumps({
+                    "status": "processing",
+                    "message": f"Generating descriptions for {len(table_columns)} tables",
+                    "progress": 10 + (processed_tables / total_tables) * 80
+                })
+            }
+            
+            # Progress is reported as each table finishes, in completion order
+            async for table_name, descriptions in training_service._iter_tracked_column_descriptions(
+                db, connection, table_columns, str(model_id), additional_instructions
+            ):
+                processed_tables += 1
                 try:
-                    # Send table progress
+                    # Update column descriptions
+                    await training_service._update_table_column_descriptions(db, str(model_id), table_name, descriptions)
+                    generated_count += len(descriptions)
+                    
+                    # Collect descriptions for response
+                    all_generated_descriptions[table_name] = descriptions
+                    
+                    # Send table completion progress
                     yield {
                         "event": "progress",
                         "data": json.dumps({
                             "status": "processing",
-                            "message": f"Processing table: {table_info.table_name}",
+                            "message": f"Completed table: {table_name} ({len(descriptions)} descriptions)",
                             "progress": 10 + (processed_tables / total_tables) * 80,
-                            "current_table": table_info.table_name
+                            "current_table": table_name,
+                            "table_generated": len(descriptions)
                         })
                     }
                     
-                    # Get tracked columns for this table
-                    tracked_columns = await training_service._get_model_tracked_columns_for_table(db, str(model_id), table_info.table_name)
-                    
-                    if tracked_columns:
-                        # Get connection for database access
-                        model = await training_service._get_model_and_verify_ownership(db, str(model_id), current_user)
-                        from app.services.connection_service import connection_service
-                        connection = await connection_service.get_connection_by_id(db, str(model.connection_id))
-                        
-                        # Generate descriptions for this table
-                        descriptions = await training_service._generate_tracked_column_descriptions(
-                            db, connection, table_info.table_name, tracked_columns, str(model_id), additional_instructions
-                        )
-                        
-                        # Update column descriptions
-                        for col_name, description in descriptions.items():
-                            await training_service._update_column_description(db, str(model_id), table_info.table_name, col_name, description)
-                            generated_count += 1
-                        
-                        # Collect descriptions for response
-                        all_generated_descriptions[table_info.table_name] = descriptions
-                        
-                        # Send table completion progress
-                        yield {
-                            "event": "progress",
-                            "data": json.dumps({
-                                "status": "processing",
-                                "message": f"Completed table: {table_info.table_name} ({len(descriptions)} descriptions)",
-                                "progress": 10 + (processed_tables / total_tables) * 80,
-                                "current_table": table_info.table_name,
-                                "table_generated": len(descriptions)
-                            })
-                        }
-                    
-                    processed_tables += 1
-                    
                 except Exception as e:
-                    logger.error(f"Error processing table {table_info.table_name}: {e}")
+                    logger.error(f"Error processing table {table_name}: {e}")
                     yield {
                         "event": "progress",
                         "data": json.dumps({
                             "status": "processing",
-                            "message": f"Error processing table {table_info.table_name}: {str(e)}",
+                            "message": f"Error processing table {table_name}: {str(e)}",
                             "progress": 10 + (processed_tables / total_tables) * 80,
-                            "current_table": table_info.table_name,
+                            "current_table": table_name,
                             "error": str(e)
                         })
                     }
-                    processed_tables += 1
             
             # Send completion
             yield {
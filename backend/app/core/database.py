@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import text  # Add this import
+from sqlalchemy import text, inspect  # Add this import
+from sqlalchemy.engine import make_url
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 import logging
@@ -9,15 +10,32 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# asyncpg keeps an LRU of 100 prepared statements per connection. The partial-UPDATE field
+# combinations alone (see query_cache_size) plus the app's SELECTs exceed that, so frequently
+# used statements were evicted and re-prepared (an extra round trip each); 1024 holds them all
+# at the cost of some server memory per connection for the cached plans. The option is asyncpg-only, other drivers reject it
+_CONNECT_ARGS = (
+    {"prepared_statement_cache_size": 1024}
+    if make_url(settings.DATABASE_URL).drivername == "postgresql+asyncpg"
+    else {}
+)
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     future=True,
     pool_pre_ping=True,
-    pool_recycle=300,
-    pool_size=10,
-    max_overflow=20,
+    # Requests now overlap independent reads on separate sessions, so each can hold more than one connection
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    # Fail fast instead of queueing indefinitely when the pool is saturated
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    # Room for every partial-UPDATE field combination so compiled statements stay cached
+    query_cache_size=5000,
+    # Reuse server-side prepared statements per pooled asyncpg connection
+    connect_args=_CONNECT_ARGS,
 )
 
 # Create async session maker
@@ -67,9 +85,35 @@ async def create_tables():
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await _ensure_conversation_preview_column(conn)
     
     logger.info("Database tables created successfully")
 
+async def _ensure_conversation_preview_column(conn):
+    """Add conversations.latest_message_preview to databases created before it existed.
+
+    create_all() never alters existing tables; alembic revision 0001 does the same thing and
+    stays safe to run afterwards.
+    """
+    columns = await conn.run_sync(
+        lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns("conversations")}
+    )
+    if "latest_message_preview" in columns:
+        return
+    
+    await conn.execute(text("ALTER TABLE conversations ADD COLUMN IF NOT EXISTS latest_message_preview VARCHAR(103)"))
+    await conn.execute(text("""
+        UPDATE conversations AS c
+        SET latest_message_preview = (
+            SELECT CASE WHEN length(m.content) > 100 THEN left(m.content, 100) || '...' ELSE m.content END
+            FROM messages AS m
+            WHERE m.conversation_id = c.id
+            ORDER BY m.created_at DESC
+            LIMIT 1
+        )
+    """))
+    logger.info("Added conversations.latest_message_preview and backfilled it")
+
 async def drop_tables():
     """Drop all tables (for testing/development)"""
     from app.models.database import Base
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
 from fastapi import Request
 from sse_starlette import EventSourceResponse
+from sse_starlette.sse import ServerSentEvent
 import logging
 
 from app.models.sse_schemas import SSEEvent, create_sse_event, create_log_event
@@ -68,6 +69,11 @@ class SSEConnection:
 class SSEManager:
     """Manages all SSE connections and event broadcasting with bulletproof event delivery"""
     
+    _completion_events = frozenset([
+        "test_completed", "training_completed", "data_generation_completed", "completed",
+        "test_failed", "training_error", "data_generation_error", "error"
+    ])
+    
     def __init__(self):
         # Connection management
         self.connections: Dict[str, SSEConnection] = {}
@@ -79,6 +85,9 @@ class SSEManager:
         self.max_history_per_task = 50
         self.max_history_age_seconds = 300  # 5 minutes
         
+        # Events already queued for a connection are flushed together in one write
+        self.max_events_per_write = 32
+        
         # Background tasks
         self._cleanup_task: Optional[asyncio.Task] = None
         self._heartbeat_task: Optional[asyncio.Task] = None
@@ -277,14 +286,24 @@ class SSEManager:
                             connection.queue.get(), 
                             timeout=settings.SSE_HEARTBEAT_INTERVAL
                         )
-                        yield event_data
+                        
+                        # Coalesce whatever else is already queued, stopping at a completion event
+                        batch = [event_data]
+                        is_completed = event_data.get("event") in self._completion_events
+                        while (not is_completed and len(batch) < self.max_events_per_write
+                               and not connection.queue.empty()):
+                            event_data = connection.queue.get_nowait()
+                            batch.append(event_data)
+                            is_completed = event_data.get("event") in self._completion_events
+                        
+                        if len(batch) == 1:
+                            yield batch[0]
+                        else:
+                            yield b"".join(ServerSentEvent(**event).encode() for event in batch)
                         connection.update_ping()
                         
                         # Check if this was a completion event - if so, close connection after sending
-                        if event_data.get("event") in [
-                            "test_completed", "training_completed", "data_generation_completed", "completed",
-                            "test_failed", "training_error", "data_generation_error", "error"
-                        ]:
+                        if is_completed:
                             logger.debug(f"Received completion event, closing connection {connection_id}")
                             break
                         
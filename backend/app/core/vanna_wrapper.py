@@ -1,32 +1,56 @@
 import os
 import json
-import shutil
 from typing import Optional, Dict, Any, List
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from vanna.openai import OpenAI_Chat
 from vanna.chromadb import ChromaDB_VectorStore
+from vanna.utils import deterministic_uuid
+import functools
 import openai
 import httpx
 
 from app.models.vanna_models import VannaConfig, DatabaseConfig, VannaTrainingData
 from app.models.database import User
 from app.config import settings
+from app.utils.file_handler import file_handler
 
 logger = logging.getLogger(__name__)
 
+# Process-wide ChromaDB options, combined with each store's path
+_CHROMA_STORE_OPTIONS = {
+    "anonymized_telemetry": False,
+    "is_persistent": True,
+    "allow_reset": True
+}
+
+
+@functools.lru_cache(maxsize=4)
+def _get_shared_openai_client(base_url: str, api_key: Optional[str]) -> openai.OpenAI:
+    """Get one OpenAI client (and keep-alive HTTP pool) per backend, shared by all MyVanna instances"""
+    return openai.OpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        http_client=httpx.Client(
+            verify=False,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        )
+    )
+
 class MyVanna(OpenAI_Chat, ChromaDB_VectorStore):
     """Custom Vanna implementation for MS SQL Server"""
     
+    # Documents embedded and written to ChromaDB per batch during training
+    TRAINING_BATCH_SIZE = 64
+    
     def __init__(self, config=None):
         logger.info(f"MyVanna config received: {config}")
         
-        # Initialize OpenAI client
-        client = openai.OpenAI(
-            base_url=config.get("base_url", settings.OPENAI_BASE_URL),
-            api_key=config.get("api_key", settings.OPENAI_API_KEY),
-            http_client=httpx.Client(verify=False)
+        # Reuse the pooled OpenAI client so LLM calls keep their TLS connections across instances
+        client = _get_shared_openai_client(
+            config.get("base_url", settings.OPENAI_BASE_URL),
+            config.get("api_key", settings.OPENAI_API_KEY)
         )
         
 
@@ -36,12 +60,7 @@ class MyVanna(OpenAI_Chat, ChromaDB_VectorStore):
         logger.info(f"ChromaDB path from config: {chromadb_path}")
         
         # Create ChromaDB config for new client format with explicit persistence settings
-        chroma_config = {
-            "path": chromadb_path,
-            "anonymized_telemetry": False,
-            "is_persistent": True,
-            "allow_reset": True
-        }
+        chroma_config = {"path": chromadb_path, **_CHROMA_STORE_OPTIONS}
         
         logger.info(f"Setting ChromaDB path to: {chromadb_path}")
         logger.info(f"ChromaDB config: {chroma_config}")
@@ -59,9 +78,6 @@ class MyVanna(OpenAI_Chat, ChromaDB_VectorStore):
         # Store the config for our overridden method
         self._vanna_config = config
         
-        # Test ChromaDB write permissions after initialization
-        self._test_chromadb_write_permissions(chromadb_path)
-        
         # Override the submit_prompt method to force use of configured model
         import types
         def submit_prompt_with_forced_model(self, prompt, **kwargs):
@@ -153,16 +169,11 @@ class MyVanna(OpenAI_Chat, ChromaDB_VectorStore):
             
             # Remove the entire ChromaDB directory
             if os.path.exists(chromadb_path):
-                shutil.rmtree(chromadb_path)
+                file_handler.discard_directory(chromadb_path)
                 logger.info(f"Removed ChromaDB directory: {chromadb_path}")
             
             # Reinitialize ChromaDB with proper config
-            chroma_config = {
-                "path": chromadb_path,
-                "anonymized_telemetry": False,
-                "is_persistent": True,
-                "allow_reset": True
-            }
+            chroma_config = {"path": chromadb_path, **_CHROMA_STORE_OPTIONS}
             ChromaDB_VectorStore.__init__(self, config=chroma_config)
             logger.info("ChromaDB reinitialized after clearing")
             
@@ -177,11 +188,12 @@ class MyVanna(OpenAI_Chat, ChromaDB_VectorStore):
             chromadb_path = self._vanna_config.get("path", "./chroma")
             logger.info(f"Ensuring persistence for ChromaDB at: {chromadb_path}")
             
-            # Check if the directory exists and has files
-            if os.path.exists(chromadb_path):
-                files = os.listdir(chromadb_path)
+            # Check if the directory exists and has files (one scandir, no separate exists() stat)
+            try:
+                with os.scandir(chromadb_path) as entries:
+                    files = [entry.name for entry in entries]
                 logger.info(f"ChromaDB directory exists with {len(files)} files: {files}")
-            else:
+            except FileNotFoundError:
                 logger.warning(f"ChromaDB directory does not exist: {chromadb_path}")
                 
             # Force a sync/flush if available
@@ -193,6 +205,52 @@ class MyVanna(OpenAI_Chat, ChromaDB_VectorStore):
             logger.error(f"Failed to ensure persistence: {e}")
             raise
     
+    def _add_to_collection_batched(self, collection, documents: List[str], id_suffix: str) -> List[str]:
+        """Embed and add documents in batches, using the same ids as Vanna's single-item train()"""
+        # Duplicate ids within one add() are rejected by ChromaDB
+        documents_by_id = {deterministic_uuid(document) + id_suffix: document for document in documents}
+        ids = list(documents_by_id)
+        added_ids = []
+        
+        for start in range(0, len(ids), self.TRAINING_BATCH_SIZE):
+            batch_ids = ids[start:start + self.TRAINING_BATCH_SIZE]
+            batch_documents = [documents_by_id[doc_id] for doc_id in batch_ids]
+            try:
+                collection.add(
+                    documents=batch_documents,
+                    embeddings=self.embedding_function(batch_documents),
+                    ids=batch_ids,
+                )
+                added_ids.extend(batch_ids)
+            except Exception as e:
+                # One bad entry fails the whole batch; retry its entries one by one so only
+                # the bad ones are skipped and the remaining batches still get added
+                logger.warning(f"Failed to add training batch of {len(batch_ids)} entries, retrying individually: {e}")
+                for doc_id, document in zip(batch_ids, batch_documents):
+                    try:
+                        collection.add(
+                            documents=[document],
+                            embeddings=self.embedding_function([document]),
+                            ids=[doc_id],
+                        )
+                        added_ids.append(doc_id)
+                    except Exception as item_error:
+                        logger.error(f"Skipping training entry {doc_id}: {item_error}")
+        
+        return added_ids
+    
+    def add_documentation_batch(self, documentation: List[str]) -> List[str]:
+        """Train on many documentation entries with one embedding call and write per batch"""
+        return self._add_to_collection_batched(self.documentation_collection, documentation, "-doc")
+    
+    def add_question_sql_batch(self, examples: List[Dict[str, str]]) -> List[str]:
+        """Train on many question/SQL pairs with one embedding call and write per batch"""
+        documents = [
+            json.dumps({"question": example["question"], "sql": example["sql"]}, ensure_ascii=False)
+            for example in examples
+        ]
+        return self._add_to_collection_batched(self.sql_collection, documents, "-sql")
+    
     def connect_to_database(self, db_config):
         """Connect to MS SQL Server database"""
         try:
@@ -218,32 +276,6 @@ class MyVanna(OpenAI_Chat, ChromaDB_VectorStore):
             logger.error(f"Failed to connect to database: {e}")
             raise
     
-    def _test_chromadb_write_permissions(self, chromadb_path: str):
-        """Test ChromaDB write permissions to ensure persistence is working"""
-        try:
-            logger.info(f"Testing ChromaDB write permissions at: {chromadb_path}")
-            
-            # Ensure directory exists
-            os.makedirs(chromadb_path, exist_ok=True)
-            
-            # Test file creation
-            test_file = os.path.join(chromadb_path, ".write_test")
-            with open(test_file, 'w') as f:
-                f.write("test")
-            
-            # Test file reading
-            with open(test_file, 'r') as f:
-                content = f.read()
-            
-            # Clean up test file
-            os.remove(test_file)
-            
-            logger.info(f"✅ ChromaDB write permissions test passed at: {chromadb_path}")
-            
-        except Exception as e:
-            logger.error(f"❌ ChromaDB write permissions test failed at {chromadb_path}: {e}")
-            raise
-    
     def _build_context_aware_question(self, current_question: str, chat_history: List[Dict[str, str]]) -> str:
         """
         Build a context-aware question by incorporating relevant chat history.
@@ -1,7 +1,7 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam
 from typing import AsyncGenerator, Optional
 import logging
 import jwt
@@ -19,6 +19,19 @@ logger = logging.getLogger(__name__)
 # Security scheme
 security = HTTPBearer(auto_error=False)
 
+# Authentication lookups run on every request; the statements are built once and
+# only their parameters are bound per call, so their cache keys are memoized
+_ACTIVE_USER_BY_ID = select(User).where(
+    User.id == bindparam("user_id"),
+    User.is_active == True
+)
+_ACTIVE_USER_SESSION = select(UserSession).where(
+    UserSession.user_id == bindparam("user_id"),
+    UserSession.token_jti == bindparam("token_jti"),
+    UserSession.is_active == True,
+    UserSession.expires_at > bindparam("now")
+)
+
 # Database dependency
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Get database session dependency"""
@@ -73,12 +86,7 @@ async def get_current_user_optional(
     
     # Get user from database
     try:
-        result = await db.execute(
-            select(User).where(
-                User.id == user_id,
-                User.is_active == True
-            )
-        )
+        result = await db.execute(_ACTIVE_USER_BY_ID, {"user_id": user_id})
         user = result.scalar_one_or_none()
         
         if not user:
@@ -86,12 +94,8 @@ async def get_current_user_optional(
         
         # Verify session is still active
         session_result = await db.execute(
-            select(UserSession).where(
-                UserSession.user_id == user_id,
-                UserSession.token_jti == token_jti,
-                UserSession.is_active == True,
-                UserSession.expires_at > datetime.now(timezone.utc)
-            )
+            _ACTIVE_USER_SESSION,
+            {"user_id": user_id, "token_jti": token_jti, "now": datetime.now(timezone.utc)}
         )
         session = session_result.scalar_one_or_none()
         
@@ -146,12 +150,7 @@ async def get_current_user_from_query(
     
     # Get user from database
     try:
-        result = await db.execute(
-            select(User).where(
-                User.id == user_id,
-                User.is_active == True
-            )
-        )
+        result = await db.execute(_ACTIVE_USER_BY_ID, {"user_id": user_id})
         user = result.scalar_one_or_none()
         
         if not user:
@@ -160,12 +159,8 @@ async def get_current_user_from_query(
         
         # Verify session is still active
         session_result = await db.execute(
-            select(UserSession).where(
-                UserSession.user_id == user_id,
-                UserSession.token_jti == token_jti,
-                UserSession.is_active == True,
-                UserSession.expires_at > datetime.now(timezone.utc)
-            )
+            _ACTIVE_USER_SESSION,
+            {"user_id": user_id, "token_jti": token_jti, "now": datetime.now(timezone.utc)}
         )
         session = session_result.scalar_one_or_none()
         
@@ -225,12 +220,7 @@ async def get_current_user(
     
     # Get user from database
     try:
-        result = await db.execute(
-            select(User).where(
-                User.id == user_id,
-                User.is_active == True
-            )
-        )
+        result = await db.execute(_ACTIVE_USER_BY_ID, {"user_id": user_id})
         user = result.scalar_one_or_none()
         
         if not user:
@@ -242,12 +232,8 @@ async def get_current_user(
         
         # Verify session is still active
         session_result = await db.execute(
-            select(UserSession).where(
-                UserSession.user_id == user_id,
-                UserSession.token_jti == token_jti,
-                UserSession.is_active == True,
-                UserSession.expires_at > datetime.now(timezone.utc)
-            )
+            _ACTIVE_USER_SESSION,
+            {"user_id": user_id, "token_jti": token_jti, "now": datetime.now(timezone.utc)}
         )
         session = session_result.scalar_one_or_none()
         
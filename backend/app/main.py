@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 from app.config import settings, validate_settings
@@ -43,6 +44,14 @@ async def lifespan(app: FastAPI):
     # Start SSE manager
     await sse_manager.start()
     
+    # Reap ChromaDB and upload directories left half-deleted by a previous run (without
+    # delaying startup; trash directories are ignored by the scan), then index trained stores
+    from app.services.vanna_service import vanna_service
+    from app.utils.file_handler import file_handler
+    vanna_service.sweep_chromadb_trash()
+    file_handler.sweep_discarded_directories(settings.UPLOAD_DIR)
+    await asyncio.to_thread(vanna_service.load_trained_store_paths)
+    
     logger.info("Application startup complete")
     
     yield
@@ -53,6 +62,10 @@ async def lifespan(app: FastAPI):
     # Stop SSE manager
     await sse_manager.stop()
     
+    # Close the OpenAI client's HTTP connection pool
+    from app.services.training_service import close_openai_client
+    await close_openai_client()
+    
     # Close database connections
     await close_database()
     
@@ -4,7 +4,8 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from enum import Enum
-import uuid
+# Rust-backed uuid4 that still returns stdlib uuid.UUID objects
+import uuid_utils.compat as uuid
 
 Base = declarative_base()
 
@@ -73,6 +74,7 @@ class Conversation(Base):
     # Analytics
     message_count = Column(Integer, default=0)
     total_queries = Column(Integer, default=0)
+    latest_message_preview = Column(String(103), nullable=True)  # Truncated latest message, kept up to date by add_message
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -477,9 +477,11 @@ class AuthService:
         
         # Keep only the most recently used session (current one)
         if len(sessions) > 1:
-            sessions_sorted = sorted(sessions, key=lambda s: s.last_used_at, reverse=True)
-            for session in sessions_sorted[1:]:  # All except the most recent
-                session.is_active = False
+            # One pass for the newest session; no need to sort the rest
+            most_recent = max(sessions, key=lambda s: s.last_used_at)
+            for session in sessions:
+                if session is not most_recent:  # All except the most recent
+                    session.is_active = False
         
         await db.commit()
         
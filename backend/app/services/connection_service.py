@@ -324,6 +324,9 @@ class ConnectionService:
             await db.commit()
             await db.refresh(connection)
             
+            from app.services.user_service import user_service
+            user_service.invalidate_user_cache(user.id)
+            
             # Convert to response model
             return ConnectionResponse.model_validate({
                 **connection.__dict__,
@@ -362,6 +365,25 @@ class ConnectionService:
             logger.error(f"Failed to get user connection: {e}")
             raise
     
+    async def get_user_connection_full(
+        self, 
+        db: AsyncSession, 
+        user_id: str, 
+        connection_id: str
+    ) -> Optional[Connection]:
+        """Get raw connection object that belongs to a user (authorizes and loads in one query)"""
+        try:
+            stmt = select(Connection).where(
+                Connection.id == connection_id,
+                Connection.user_id == user_id
+            )
+            result = await db.execute(stmt)
+            return result.scalar_one_or_none()
+            
+        except Exception as e:
+            logger.error(f"Failed to get user connection: {e}")
+            raise
+    
     async def get_connection_by_id(self, db: AsyncSession, connection_id: str) -> Optional[Connection]:
         """Get raw connection object by ID"""
         try:
@@ -450,6 +472,12 @@ class ConnectionService:
             await db.execute(stmt)
             await db.commit()
             
+            from app.services.user_service import user_service
+            user_service.invalidate_user_cache(user_id)
+            # Imported here: vanna_service imports this module
+            from app.services.vanna_service import vanna_service
+            vanna_service.invalidate_connection_vanna_instances(str(connection_id))
+            
             return True
             
         except Exception as e:
@@ -471,6 +499,10 @@ class ConnectionService:
             )
             await db.execute(stmt)
             await db.commit()
+            
+            # Cached instances skip the Connection lookup, so drop them when the row changes
+            from app.services.vanna_service import vanna_service
+            vanna_service.invalidate_connection_vanna_instances(str(connection_id))
             return True
         except Exception as e:
             await db.rollback()
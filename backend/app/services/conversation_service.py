@@ -1,3 +1,4 @@
+import asyncio
 import json
 import uuid
 from typing import Optional, List, Dict, Any
@@ -20,6 +21,7 @@ from app.models.vanna_models import (
 )
 from app.services.vanna_service import vanna_service
 from app.services.connection_service import connection_service
+from app.services.user_service import user_service
 from app.core.sse_manager import sse_manager
 from app.utils.sse_utils import SSELogger
 from app.config import settings
@@ -27,6 +29,13 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 
 
+def _message_preview(content: Optional[str]) -> Optional[str]:
+    """Truncate message content for conversation list previews"""
+    if not content:
+        return None
+    return content[:100] + "..." if len(content) > 100 else content
+
+
 class ConversationService:
     """Service for conversation management and query processing with user authentication"""
     
@@ -86,25 +95,16 @@ class ConversationService:
                 await db.commit()
                 await sse_logger.info("Connection locked to this conversation")
             
-            # Verify user owns the connection
-            connection_response = await connection_service.get_user_connection(
+            # Load the connection, verifying the user owns it
+            connection = await connection_service.get_user_connection_full(
                 db, str(user.id), str(conversation.connection_id)
             )
-            if not connection_response:
+            if not connection:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Access denied: Connection does not belong to user"
                 )
             
-            # Get raw connection for internal operations
-            connection = await self._get_connection(db, str(conversation.connection_id))
-            if not connection:
-                raise ValueError(f"Connection {conversation.connection_id} not found")
-            
-            # Double-check user ownership
-            if str(connection.user_id) != str(user.id):
-                raise ValueError(f"Access denied: Connection does not belong to user {user.email}")
-            
             # Find a trained model for this connection
             from app.models.database import Model, ModelStatus
             model_stmt = select(Model).where(
@@ -315,39 +315,19 @@ class ConversationService:
             # This will use the existing trained model's ChromaDB and configuration
             from app.services.vanna_service import vanna_service
             
-            # Get the latest ChromaDB path for the trained model
-            chromadb_path = vanna_service._get_latest_chromadb_path(str(trained_model.id))
-            if not chromadb_path:
+            # Reuse the cached instance for this trained model and connection; the connection
+            # row is only loaded to build a new instance
+            vanna_instance = vanna_service.get_cached_vanna_instance(
+                str(trained_model.id), str(trained_model.connection_id)
+            )
+            if vanna_instance is None:
+                # Get the connection for database access
+                from app.services.connection_service import connection_service
+                connection = await connection_service.get_connection_by_id(db, str(trained_model.connection_id))
+                vanna_instance = await vanna_service.get_vanna_instance(str(trained_model.id), connection)
+            if not vanna_instance:
                 raise ValueError("No trained model data found")
             
-            # Create Vanna instance using the trained model's configuration
-            vanna_config_dict = {
-                "api_key": settings.OPENAI_API_KEY,
-                "base_url": settings.OPENAI_BASE_URL,
-                "model": settings.OPENAI_MODEL,
-                "embedding_model": settings.OPENAI_EMBEDDING_MODEL,
-                "path": chromadb_path
-            }
-            
-            from app.core.vanna_wrapper import MyVanna
-            vanna_instance = MyVanna(config=vanna_config_dict)
-            
-            # Get the connection for database access
-            from app.services.connection_service import connection_service
-            connection = await connection_service.get_connection_by_id(db, str(trained_model.connection_id))
-            if connection:
-                from app.models.vanna_models import DatabaseConfig
-                db_config = DatabaseConfig(
-                    server=connection.server,
-                    database_name=connection.database_name,
-                    username=connection.username,
-                    password=connection.password,
-                    driver=connection.driver or 'ODBC Driver 17 for SQL Server',
-                    encrypt=connection.encrypt,
-                    trust_server_certificate=connection.trust_server_certificate
-                )
-                vanna_instance.connect_to_database(db_config)
-            
             if sse_logger:
                 if vanna_instance:
                     user_info = f" for user {user.email}" if user else ""
@@ -399,10 +379,10 @@ class ConversationService:
                 "path": f"data/conversations/{connection.id}/chromadb"  # Use conversation-specific path
             }
             
-            vanna_instance = MyVanna(config=vanna_config_dict)
+            vanna_instance = await asyncio.to_thread(MyVanna, config=vanna_config_dict)
             
             # Connect to database
-            vanna_instance.connect_to_database(db_config)
+            await asyncio.to_thread(vanna_instance.connect_to_database, db_config)
             
             if sse_logger:
                 if vanna_instance:
@@ -433,8 +413,10 @@ class ConversationService:
         try:
             await sse_logger.info(f"Original question: {question}")
             
-            # Pass chat history directly to Vanna for processing
-            sql = vanna_instance.generate_sql_with_context(
+            # Pass chat history directly to Vanna for processing; the LLM call blocks, so it
+            # runs in a worker thread to keep the event loop serving other requests
+            sql = await asyncio.to_thread(
+                vanna_instance.generate_sql_with_context,
                 question=question, 
                 chat_history=chat_history,
                 allow_llm_to_see_data=True
@@ -498,7 +480,7 @@ class ConversationService:
     ) -> Optional[List[Dict[str, Any]]]:
         """Execute SQL and return data"""
         try:
-            df = vanna_instance.run_sql(sql=sql)
+            df = await asyncio.to_thread(vanna_instance.run_sql, sql=sql)
             
             if df is not None and not df.empty:
                 # Convert DataFrame to list of dictionaries
@@ -569,7 +551,8 @@ class ConversationService:
                 })
                 return ChartResponse(should_generate=False)
             
-            chart_code = vanna_instance.generate_plotly_code(
+            chart_code = await asyncio.to_thread(
+                vanna_instance.generate_plotly_code,
                 question=question, sql=sql, df=df
             )
             
@@ -577,7 +560,7 @@ class ConversationService:
                 await sse_logger.warning("Failed to generate chart code")
                 return ChartResponse(should_generate=True, error_message="Failed to generate chart code")
             
-            fig = vanna_instance.get_plotly_figure(plotly_code=chart_code, df=df)
+            fig = await asyncio.to_thread(vanna_instance.get_plotly_figure, plotly_code=chart_code, df=df)
             
             if fig:
                 chart_json = fig.to_dict()
@@ -624,7 +607,7 @@ class ConversationService:
             import pandas as pd
             df = pd.DataFrame(data)
             
-            summary = vanna_instance.generate_summary(question=question, df=df)
+            summary = await asyncio.to_thread(vanna_instance.generate_summary, question=question, df=df)
             
             if summary:
                 await sse_logger.info("Summary generated successfully")
@@ -657,7 +640,8 @@ class ConversationService:
             import pandas as pd
             df = pd.DataFrame(data)
             
-            followup_questions = vanna_instance.generate_followup_questions(
+            followup_questions = await asyncio.to_thread(
+                vanna_instance.generate_followup_questions,
                 question=question, sql=sql, df=df
             )
             
@@ -687,14 +671,10 @@ class ConversationService:
     ) -> SuggestedQuestionsResponse:
         """Get suggested questions for a user's connection"""
         try:
-            # Verify user owns the connection
-            connection_response = await connection_service.get_user_connection(db, str(user.id), connection_id)
-            if not connection_response:
-                raise ValueError(f"Connection {connection_id} not found or access denied for user {user.email}")
-            
-            connection = await self._get_connection(db, connection_id)
+            # Load the connection, verifying the user owns it
+            connection = await connection_service.get_user_connection_full(db, str(user.id), connection_id)
             if not connection:
-                raise ValueError(f"Connection {connection_id} not found")
+                raise ValueError(f"Connection {connection_id} not found or access denied for user {user.email}")
             
             # Find a trained model for this connection
             from app.models.database import Model, ModelStatus
@@ -726,7 +706,7 @@ class ConversationService:
             if not vanna_instance:
                 raise ValueError("Failed to load AI model")
             
-            questions = vanna_instance.generate_questions()
+            questions = await asyncio.to_thread(vanna_instance.generate_questions)
             
             logger.info(f"Generated {len(questions)} suggested questions for user {user.email}, connection {connection_id}")
             
@@ -794,6 +774,7 @@ class ConversationService:
         db.add(conversation)
         await db.commit()
         await db.refresh(conversation)
+        user_service.invalidate_user_cache(user.id)
         
         logger.info(f"Conversation created: {conversation.id} for user {user.email} with connection {connection_response.name}")
         return conversation
@@ -875,14 +856,6 @@ class ConversationService:
             )
             connection_name = connection_result.scalar() or "Unknown Connection"
             
-            # Get latest message
-            latest_message_result = await db.execute(
-                select(Message.content).where(
-                    Message.conversation_id == conv.id
-                ).order_by(desc(Message.created_at)).limit(1)
-            )
-            latest_message = latest_message_result.scalar()
-            
             # Get actual message count for verification
             actual_count_result = await db.execute(
                 select(func.count(Message.id)).where(
@@ -909,7 +882,7 @@ class ConversationService:
                 created_at=conv.created_at,
                 updated_at=conv.updated_at,
                 last_message_at=conv.last_message_at,
-                latest_message=latest_message
+                latest_message=conv.latest_message_preview
             ))
         
         return result
@@ -1005,31 +978,30 @@ class ConversationService:
         try:
             conversation_uuid = uuid.UUID(conversation_id)
             
-            # First verify the conversation belongs to the user
-            stmt = select(Conversation).where(
+            # Delete the conversation (only if the user owns it) and its messages in one
+            # statement; foreign keys are checked at the end of the statement, so the
+            # order of the two CTEs does not matter
+            from sqlalchemy import delete
+            deleted_conversation = delete(Conversation).where(
                 Conversation.id == conversation_uuid,
                 Conversation.user_id == user.id
-            )
+            ).returning(Conversation.id).cte("deleted_conversation")
+            
+            deleted_messages = delete(Message).where(
+                Message.conversation_id.in_(select(deleted_conversation.c.id))
+            ).cte("deleted_messages")
+            
+            stmt = select(deleted_conversation.c.id).add_cte(deleted_messages)
             result = await db.execute(stmt)
-            conversation = result.scalar_one_or_none()
+            deleted_id = result.scalar_one_or_none()
             
-            if not conversation:
+            if not deleted_id:
+                await db.rollback()
                 logger.warning(f"Conversation {conversation_id} not found for user {user.email}")
                 return False
             
-            # Delete all messages first (due to foreign key constraints)
-            from sqlalchemy import delete
-            delete_messages_stmt = delete(Message).where(Message.conversation_id == conversation_uuid)
-            await db.execute(delete_messages_stmt)
-            
-            # Delete the conversation
-            delete_conversation_stmt = delete(Conversation).where(
-                Conversation.id == conversation_uuid,
-                Conversation.user_id == user.id
-            )
-            await db.execute(delete_conversation_stmt)
-            
             await db.commit()
+            user_service.invalidate_user_cache(user.id)
             
             logger.info(f"Successfully deleted conversation {conversation_id} for user {user.email}")
             return True
@@ -1077,6 +1049,7 @@ class ConversationService:
         
         # Increment counts
         conversation.message_count += 1
+        conversation.latest_message_preview = _message_preview(message_data.content)
         conversation.last_message_at = datetime.now(timezone.utc)
         conversation.updated_at = datetime.now(timezone.utc)
         
@@ -1096,6 +1069,7 @@ class ConversationService:
         await db.commit()
         await db.refresh(message)
         await db.refresh(conversation)  # Refresh to get updated counts
+        user_service.invalidate_user_cache(conversation.user_id)
         
         # Log final state
         logger.info(f"Message added successfully. New message_count: {conversation.message_count}, total_queries: {conversation.total_queries}")
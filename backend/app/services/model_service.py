@@ -1,7 +1,7 @@
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import and_, or_, select, func
+from sqlalchemy import and_, or_, select, insert, delete, func
 from app.models.database import (
     Model, ModelTrackedTable, ModelTrackedColumn, 
     Connection, User
@@ -13,7 +13,7 @@ from app.models.schemas import (
     ModelStatus
 )
 from app.services.connection_service import ConnectionService
-from app.services.training_service import TrainingService
+from app.services.training_service import TrainingService, column_fields_from_value_analysis
 import logging
 
 logger = logging.getLogger(__name__)
@@ -416,31 +416,26 @@ class ModelService:
             raise ValueError("Tracked table not found")
         
         # Remove existing columns
-        stmt = select(ModelTrackedColumn).where(ModelTrackedColumn.model_tracked_table_id == table_id)
-        result = await self.db.execute(stmt)
-        existing_columns = result.scalars().all()
-        
-        for column in existing_columns:
-            await self.db.delete(column)
+        stmt = delete(ModelTrackedColumn).where(ModelTrackedColumn.model_tracked_table_id == table_id)
+        await self.db.execute(stmt)
         
-        # Add new columns
+        # Add new columns in one multi-row INSERT; RETURNING hydrates IDs and defaults
         new_columns = []
-        for col_data in columns_data:
-            column = ModelTrackedColumn(
-                model_tracked_table_id=table_id,
-                column_name=col_data.column_name,
-                is_tracked=col_data.is_tracked,
-                description=col_data.description
-            )
-            new_columns.append(column)
-            self.db.add(column)
+        if columns_data:
+            values = [
+                {
+                    "model_tracked_table_id": table_id,
+                    "column_name": col_data.column_name,
+                    "is_tracked": col_data.is_tracked,
+                    "description": col_data.description
+                }
+                for col_data in columns_data
+            ]
+            result = await self.db.execute(insert(ModelTrackedColumn).returning(ModelTrackedColumn), values)
+            new_columns = result.scalars().all()
         
         await self.db.commit()
         
-        # Refresh columns to get IDs
-        for column in new_columns:
-            await self.db.refresh(column)
-        
         # Analyze and store value information for tracked columns
         if new_columns:
             logger.info(f"Starting value analysis for {len(new_columns)} tracked columns in table {tracked_table.table_name}")
@@ -490,48 +485,26 @@ class ModelService:
             training_service = TrainingService()
             training_service.db = self.db  # Set the database session
             
-            # Analyze each tracked column
+            # Get column data types from the database schema once, indexed by column name
+            columns_info = await self.connection_service.get_table_columns(self.db, str(model.connection_id), table_name)
+            columns_info_by_name = {col['column_name']: col for col in columns_info}
+            
+            # Analyze each tracked column (_analyze_column_values handles its own errors)
             for column in columns:
                 if column.is_tracked:
-                    try:
-                        # Get column data type from database schema
-                        columns_info = await self.connection_service.get_table_columns(self.db, str(model.connection_id), table_name)
-                        column_info = next((col for col in columns_info if col['column_name'] == column.column_name), None)
+                    column_info = columns_info_by_name.get(column.column_name)
+                    
+                    if column_info:
+                        # Analyze column values
+                        value_analysis = await training_service._analyze_column_values(connection, table_name, column.column_name, column_info['data_type'])
+                        
+                        # Update column with value information
+                        for field, value in column_fields_from_value_analysis(value_analysis).items():
+                            setattr(column, field, value)
                         
-                        if column_info:
-                            # Analyze column values
-                            value_analysis = await training_service._analyze_column_values(connection, table_name, column.column_name, column_info['data_type'])
-                            
-                            # Update column with value information
-                            if 'categories' in value_analysis:
-                                column.value_categories = value_analysis['categories']
-                            if 'range' in value_analysis:
-                                column.value_range_min = str(value_analysis['range'].get('min', ''))
-                                column.value_range_max = str(value_analysis['range'].get('max', ''))
-                            if 'date_range' in value_analysis:
-                                column.value_range_min = value_analysis['date_range'].get('start', '')
-                                column.value_range_max = value_analysis['date_range'].get('end', '')
-                            if 'distinct_count' in value_analysis:
-                                column.value_distinct_count = value_analysis['distinct_count']
-                            if 'is_categorical' in value_analysis:
-                                column.value_data_type = 'categorical'
-                                # Store low-cardinality flag for categorical columns with 30 or fewer distinct values
-                                if value_analysis.get('is_low_cardinality', False):
-                                    column.value_is_low_cardinality = True
-                            elif 'is_numerical' in value_analysis:
-                                column.value_data_type = 'numerical'
-                            elif 'is_temporal' in value_analysis:
-                                column.value_data_type = 'temporal'
-                            elif 'is_high_cardinality' in value_analysis:
-                                column.value_data_type = 'high_cardinality'
-                                column.value_sample_size = value_analysis.get('sample_size', 20)
-                            
-                            logger.info(f"Analyzed values for {table_name}.{column.column_name}: {value_analysis}")
-                        else:
-                            logger.warning(f"Column info not found for {table_name}.{column.column_name}")
-                            
-                    except Exception as e:
-                        logger.error(f"Failed to analyze values for {table_name}.{column.column_name}: {e}")
+                        logger.info(f"Analyzed values for {table_name}.{column.column_name}: {value_analysis}")
+                    else:
+                        logger.warning(f"Column info not found for {table_name}.{column.column_name}")
             
             # Commit all changes
             await self.db.commit()
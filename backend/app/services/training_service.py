@@ -1,15 +1,20 @@
 import os
-import json
+import re
+import orjson
 import uuid
 import asyncio
+import functools
+import weakref
 import pyodbc
 from typing import Optional, List, Dict, Any, Callable
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_, text
+from sqlalchemy import select, insert, update, delete, and_, or_, text
 from datetime import datetime
 import logging
 import openai
 import httpx
+from aiolimiter import AsyncLimiter
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
 from app.models.database import (
     Model, ModelTrackedTable, ModelTrackedColumn,
@@ -35,22 +40,152 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Paces LLM calls to the configured requests-per-minute budget. Module level so the budget is
+# process-wide: TrainingService is instantiated in several places (model_service included)
+_RPM_LIMITER = AsyncLimiter(settings.OPENAI_RPM, 60)
+
+# Static system messages, built once and shared by every request
+_COLUMN_DESCRIPTION_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a database expert specializing in Microsoft SQL Server. Generate clear, concise descriptions for database columns."
+}
+_EXAMPLE_GENERATION_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a SQL expert specializing in Microsoft SQL Server."
+}
+_CROSS_TABLE_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a SQL expert specializing in Microsoft SQL Server joins and cross-table queries."
+}
+_SQL_GENERATION_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are an expert SQL developer specializing in Microsoft SQL Server. Generate only the SQL query without any explanations or markdown formatting."
+}
+
+# Labelled lines in LLM responses, compiled once instead of strip/startswith/replace per line
+_COLUMN_DESCRIPTION_LINE_RE = re.compile(r'^[ \t]*(Column|Description):(.*)$', re.MULTILINE)
+_EXAMPLE_LINE_RE = re.compile(r'^[ \t]*(Question|SQL):(.*)$', re.MULTILINE)
+_TOP_SPACING_RE = re.compile(r'TOP(\d+)')
+
+
+@functools.lru_cache(maxsize=None)
+def _load_prompt_template(template_path: str) -> str:
+    """Read a prompt template from disk once; a missing file raises and is not cached"""
+    with open(template_path, 'r') as f:
+        return f.read()
+
+
+# Event loop -> its async OpenAI client. An httpx.AsyncClient's pool is bound to the loop it
+# first ran on, so each loop gets its own client; it is dropped along with its loop
+_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+
+def _get_shared_openai_client() -> openai.AsyncOpenAI:
+    """Get the running loop's async OpenAI client (and HTTP pool), shared across service instances"""
+    loop = asyncio.get_running_loop()
+    client = _openai_clients.get(loop)
+    if client is None:
+        client = openai.AsyncOpenAI(
+            base_url=settings.OPENAI_BASE_URL,
+            api_key=settings.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(
+                verify=False,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+            )
+        )
+        _openai_clients[loop] = client
+    return client
+
+
+async def close_openai_client() -> None:
+    """Close the running loop's OpenAI client and its connection pool, e.g. on app shutdown"""
+    client = _openai_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+@functools.lru_cache(maxsize=1024)
+def _format_column_value_info(categories: tuple, distinct_count, range_min, range_max) -> str:
+    """Format stored value information (categories, range or distinct count) for a prompt"""
+    if categories:
+        return f"Categories ({distinct_count} distinct): {', '.join(categories)}"
+    
+    if range_min or range_max:
+        distinct_count = distinct_count or 0
+        if range_min and range_max:
+            return f"Range: {range_min} to {range_max} ({distinct_count} distinct values)"
+        if range_min:
+            return f"Min: {range_min} ({distinct_count} distinct values)"
+        return f"Max: {range_max} ({distinct_count} distinct values)"
+    
+    if distinct_count and distinct_count > 0:
+        return f"Distinct values: {distinct_count}"
+    
+    return ""
+
+
+def _row_to_response_dict(row) -> Dict[str, Any]:
+    """Convert a selected Row to a response dict with an ISO created_at"""
+    data = row._asdict()
+    created_at = data.get("created_at")
+    data["created_at"] = created_at.isoformat() if created_at else None
+    return data
+
+
+# value_analysis key -> builder for the tracked column fields it sets, applied in order
+_VALUE_ANALYSIS_FIELD_BUILDERS = (
+    ('categories', lambda value: {'value_categories': value}),
+    ('range', lambda value: {'value_range_min': str(value.get('min', '')), 'value_range_max': str(value.get('max', ''))}),
+    ('date_range', lambda value: {'value_range_min': value.get('start', ''), 'value_range_max': value.get('end', '')}),
+    ('distinct_count', lambda value: {'value_distinct_count': value}),
+)
+
+
+def column_fields_from_value_analysis(value_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a column value analysis to ModelTrackedColumn value information fields"""
+    fields = {}
+    for key, build_fields in _VALUE_ANALYSIS_FIELD_BUILDERS:
+        if key in value_analysis:
+            fields.update(build_fields(value_analysis[key]))
+    
+    if 'is_categorical' in value_analysis:
+        fields['value_data_type'] = 'categorical'
+        # Store low-cardinality flag for categorical columns with 30 or fewer distinct values
+        if value_analysis.get('is_low_cardinality', False):
+            fields['value_is_low_cardinality'] = True
+    elif 'is_numerical' in value_analysis:
+        fields['value_data_type'] = 'numerical'
+    elif 'is_temporal' in value_analysis:
+        fields['value_data_type'] = 'temporal'
+    elif 'is_high_cardinality' in value_analysis:
+        fields['value_data_type'] = 'high_cardinality'
+        fields['value_sample_size'] = value_analysis.get('sample_size', 20)
+    
+    return fields
+
+
 class TrainingService:
     """Service for generating training data and training Vanna models with user authentication"""
     
     def __init__(self):
         self.data_dir = settings.DATA_DIR
-        self.openai_client = None
 
     def _get_openai_client(self):
         """Get OpenAI client with configuration"""
-        if not self.openai_client:
-            self.openai_client = openai.OpenAI(
-                base_url=settings.OPENAI_BASE_URL,
-                api_key=settings.OPENAI_API_KEY,
-                http_client=httpx.Client(verify=False)
-            )
-        return self.openai_client
+        # Only called on the event loop, so building the client needs no lock
+        return _get_shared_openai_client()
+    
+    @retry(
+        retry=retry_if_exception_type(openai.RateLimitError),
+        wait=wait_random_exponential(min=1, max=60),
+        stop=stop_after_attempt(6),
+        reraise=True
+    )
+    async def _create_chat_completion(self, **kwargs):
+        """Create a chat completion, rate limited and retried with backoff on 429s"""
+        client = self._get_openai_client()
+        async with _RPM_LIMITER:
+            return await client.chat.completions.create(**kwargs)
     
     def _build_odbc_connection_string(self, connection: Connection) -> str:
         """Build ODBC connection string from database connection object"""
@@ -145,9 +280,8 @@ class TrainingService:
                 )
                 
                 # Update all column descriptions for the table
-                for col_name, description in descriptions.items():
-                    await self._update_column_description(db, model_id, table_name, col_name, description)
-                    generated_count += 1
+                await self._update_table_column_descriptions(db, model_id, table_name, descriptions)
+                generated_count += len(descriptions)
                 
                 # Return the generated descriptions in the response
                 generated_descriptions = {table_name: descriptions}
@@ -160,27 +294,20 @@ class TrainingService:
                 
                 all_generated_descriptions = {}
                 
-                for table_info in tracked_tables:
-                    logger.info(f"🔍 Processing table: {table_info.table_name}")
-                    # Get tracked columns for this table
-                    tracked_columns = await self._get_model_tracked_columns_for_table(db, model_id, table_info.table_name)
-                    logger.info(f"🔍 Found {len(tracked_columns)} tracked columns for table {table_info.table_name}")
-                    if tracked_columns:
-                        logger.info(f"🔍 Generating descriptions for {len(tracked_columns)} columns in table {table_info.table_name}")
-                        descriptions = await self._generate_tracked_column_descriptions(
-                            db, connection, table_info.table_name, tracked_columns, model_id, additional_instructions
-                        )
-                        logger.info(f"🔍 Generated {len(descriptions)} descriptions for table {table_info.table_name}")
-                        
-                        # Update all column descriptions for each table
-                        for col_name, description in descriptions.items():
-                            await self._update_column_description(db, model_id, table_info.table_name, col_name, description)
-                            generated_count += 1
-                        
-                        # Collect descriptions for response
-                        all_generated_descriptions[table_info.table_name] = descriptions
-                    else:
-                        logger.warning(f"⚠️ No tracked columns found for table {table_info.table_name}")
+                # Get tracked columns for every table up front, then fan out the LLM calls
+                table_columns = await self._get_tracked_columns_by_table(db, model_id, tracked_tables)
+                
+                async for table_name, descriptions in self._iter_tracked_column_descriptions(
+                    db, connection, table_columns, model_id, additional_instructions
+                ):
+                    logger.info(f"🔍 Generated {len(descriptions)} descriptions for table {table_name}")
+                    
+                    # Update all column descriptions for each table
+                    await self._update_table_column_descriptions(db, model_id, table_name, descriptions)
+                    generated_count += len(descriptions)
+                    
+                    # Collect descriptions for response
+                    all_generated_descriptions[table_name] = descriptions
                 
                 generated_descriptions = all_generated_descriptions
             
@@ -247,9 +374,8 @@ class TrainingService:
                 logger.info(f"🔍 generate_table_descriptions: Received descriptions: {descriptions}")
                 
                 # Update all column descriptions for the table
-                for col_name, description in descriptions.items():
-                    await self._update_column_description(db, model_id, table_name, col_name, description)
-                    generated_count += 1
+                await self._update_table_column_descriptions(db, model_id, table_name, descriptions)
+                generated_count += len(descriptions)
                 
                 # Return the generated descriptions in the response
                 generated_descriptions = {table_name: descriptions}
@@ -259,21 +385,18 @@ class TrainingService:
                 tracked_tables = await self._get_model_tracked_tables(db, model_id)
                 all_generated_descriptions = {}
                 
-                for table_info in tracked_tables:
-                    # Get tracked columns for this table
-                    tracked_columns = await self._get_model_tracked_columns_for_table(db, model_id, table_info.table_name)
-                    if tracked_columns:
-                        descriptions = await self._generate_tracked_column_descriptions(
-                            db, connection, table_info.table_name, tracked_columns, model_id, additional_instructions
-                        )
-                        
-                        # Update all column descriptions for each table
-                        for col_name, description in descriptions.items():
-                            await self._update_column_description(db, model_id, table_info.table_name, col_name, description)
-                            generated_count += 1
-                        
-                        # Collect descriptions for response
-                        all_generated_descriptions[table_info.table_name] = descriptions
+                # Get tracked columns for every table up front, then fan out the LLM calls
+                table_columns = await self._get_tracked_columns_by_table(db, model_id, tracked_tables)
+                
+                async for table_name, descriptions in self._iter_tracked_column_descriptions(
+                    db, connection, table_columns, model_id, additional_instructions
+                ):
+                    # Update all column descriptions for each table
+                    await self._update_table_column_descriptions(db, model_id, table_name, descriptions)
+                    generated_count += len(descriptions)
+                    
+                    # Collect descriptions for response
+                    all_generated_descriptions[table_name] = descriptions
                 
                 generated_descriptions = all_generated_descriptions
             
@@ -320,8 +443,6 @@ class TrainingService:
         """Generate AI description for a single column"""
         try:
             logger.info(f"🔍 _generate_single_column_description called for table {table_name}, column {column_name}, model {model_id}")
-            client = self._get_openai_client()
-            
             # Get column information from database schema
             columns = await connection_service.get_table_columns(
                 db=db,
@@ -354,10 +475,10 @@ class TrainingService:
             
             logger.info(f"🔍 AI Prompt for single column {column_name}: {prompt}")
             
-            response = client.chat.completions.create(
+            response = await self._create_chat_completion(
                 model=settings.OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are a database expert specializing in Microsoft SQL Server. Generate clear, concise descriptions for database columns."},
+                    _COLUMN_DESCRIPTION_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
@@ -376,34 +497,29 @@ class TrainingService:
     async def _get_all_tracked_columns_for_model(self, db: AsyncSession, model_id: str) -> List[Dict[str, Any]]:
         """Get all tracked columns for a model (only where is_tracked is true)"""
         try:
-            # Get all tracked tables for this model
-            stmt = select(ModelTrackedTable).where(ModelTrackedTable.model_id == model_id)
+            # Get tracked columns across all of the model's tracked tables in one joined query
+            stmt = select(ModelTrackedColumn, ModelTrackedTable.table_name).join(
+                ModelTrackedTable, ModelTrackedColumn.model_tracked_table_id == ModelTrackedTable.id
+            ).where(
+                and_(
+                    ModelTrackedTable.model_id == model_id,
+                    ModelTrackedColumn.is_tracked == True
+                )
+            ).order_by(ModelTrackedTable.created_at, ModelTrackedTable.id)  # keep columns grouped by table
             result = await db.execute(stmt)
-            tracked_tables = result.scalars().all()
             
             all_tracked_columns = []
             
-            for tracked_table in tracked_tables:
-                # Get tracked columns for this table (only where is_tracked is true)
-                stmt = select(ModelTrackedColumn).where(
-                    and_(
-                        ModelTrackedColumn.model_tracked_table_id == tracked_table.id,
-                        ModelTrackedColumn.is_tracked == True
-                    )
-                )
-                result = await db.execute(stmt)
-                tracked_columns = result.scalars().all()
-                
-                for tracked_col in tracked_columns:
-                    all_tracked_columns.append({
-                        "id": str(tracked_col.id),
-                        "table_name": tracked_table.table_name,
-                        "column_name": tracked_col.column_name,
-                        "data_type": "Unknown",  # ModelTrackedColumn doesn't store this
-                        "description": tracked_col.description,
-                        "value_range": None,  # ModelTrackedColumn doesn't store this
-                        "created_at": tracked_col.created_at.isoformat() if tracked_col.created_at else None
-                    })
+            for tracked_col, table_name in result.all():
+                all_tracked_columns.append({
+                    "id": str(tracked_col.id),
+                    "table_name": table_name,
+                    "column_name": tracked_col.column_name,
+                    "data_type": "Unknown",  # ModelTrackedColumn doesn't store this
+                    "description": tracked_col.description,
+                    "value_range": None,  # ModelTrackedColumn doesn't store this
+                    "created_at": tracked_col.created_at.isoformat() if tracked_col.created_at else None
+                })
             
             return all_tracked_columns
         except Exception as e:
@@ -441,29 +557,29 @@ class TrainingService:
             logger.info(f"🔍 Found {len(tracked_columns)} tracked columns for table {table_name}")
             
             # Convert to dictionary format for consistency
-            columns = []
-            for col in tracked_columns:
-                columns.append({
-                    'column_name': col.column_name,
-                    'data_type': 'Unknown',  # ModelTrackedColumn doesn't have data_type
-                    'is_nullable': True,     # ModelTrackedColumn doesn't have is_nullable
-                    'description': col.description or '',
-                    # Value information fields
-                    'value_categories': col.value_categories,
-                    'value_range_min': col.value_range_min,
-                    'value_range_max': col.value_range_max,
-                    'value_distinct_count': col.value_distinct_count,
-                    'value_data_type': col.value_data_type,
-                    'value_sample_size': col.value_sample_size,
-                    'is_low_cardinality': col.value_is_low_cardinality
-                })
-            
-            return columns
+            return [self._tracked_column_to_dict(col) for col in tracked_columns]
             
         except Exception as e:
             logger.error(f"Failed to get tracked columns for table {table_name}: {e}")
             return []
 
+    def _tracked_column_to_dict(self, col: ModelTrackedColumn) -> Dict[str, Any]:
+        """Convert a tracked column to the dictionary format used for description generation"""
+        return {
+            'column_name': col.column_name,
+            'data_type': 'Unknown',  # ModelTrackedColumn doesn't have data_type
+            'is_nullable': True,     # ModelTrackedColumn doesn't have is_nullable
+            'description': col.description or '',
+            # Value information fields
+            'value_categories': col.value_categories,
+            'value_range_min': col.value_range_min,
+            'value_range_max': col.value_range_max,
+            'value_distinct_count': col.value_distinct_count,
+            'value_data_type': col.value_data_type,
+            'value_sample_size': col.value_sample_size,
+            'is_low_cardinality': col.value_is_low_cardinality
+        }
+
     async def _generate_tracked_column_descriptions(
         self,
         db: AsyncSession,
@@ -475,8 +591,6 @@ class TrainingService:
     ) -> Dict[str, str]:
         """Generate AI descriptions for tracked columns in a table"""
         try:
-            client = self._get_openai_client()
-            
             if not tracked_columns:
                 return {}
             
@@ -488,10 +602,10 @@ class TrainingService:
             
             logger.info(f"🔍 AI Prompt for table {table_name}: {prompt}")
             
-            response = client.chat.completions.create(
+            response = await self._create_chat_completion(
                 model=settings.OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are a database expert specializing in Microsoft SQL Server. Generate clear, concise descriptions for database columns."},
+                    _COLUMN_DESCRIPTION_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
@@ -509,6 +623,64 @@ class TrainingService:
             logger.error(f"Failed to generate tracked column descriptions: {e}")
             return {}
 
+    async def _get_tracked_columns_by_table(
+        self,
+        db: AsyncSession,
+        model_id: str,
+        tracked_tables: List[ModelTrackedTable]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Get tracked columns for each table, skipping tables without any"""
+        if not tracked_tables:
+            return {}
+        
+        # One IN query for every table's columns instead of two round trips per table
+        stmt = select(ModelTrackedColumn).where(
+            and_(
+                ModelTrackedColumn.model_tracked_table_id.in_([table_info.id for table_info in tracked_tables]),
+                ModelTrackedColumn.is_tracked == True
+            )
+        )
+        result = await db.execute(stmt)
+        columns_by_table_id: Dict[Any, List[Dict[str, Any]]] = {}
+        for col in result.scalars():
+            columns_by_table_id.setdefault(col.model_tracked_table_id, []).append(self._tracked_column_to_dict(col))
+        
+        table_columns = {}
+        for table_info in tracked_tables:
+            tracked_columns = columns_by_table_id.get(table_info.id)
+            if tracked_columns:
+                table_columns[table_info.table_name] = tracked_columns
+            else:
+                logger.warning(f"⚠️ No tracked columns found for table {table_info.table_name}")
+        return table_columns
+
+    async def _iter_tracked_column_descriptions(
+        self,
+        db: AsyncSession,
+        connection: Connection,
+        table_columns: Dict[str, List[Dict[str, Any]]],
+        model_id: str,
+        additional_instructions: Optional[str] = None
+    ):
+        """Generate descriptions for several tables concurrently, yielding (table_name, descriptions) as each completes"""
+        semaphore = asyncio.Semaphore(settings.OPENAI_CONCURRENCY)
+        
+        async def _generate(table_name: str, tracked_columns: List[Dict[str, Any]]):
+            async with semaphore:
+                # _generate_tracked_column_descriptions never touches db, so sharing the session is safe
+                descriptions = await self._generate_tracked_column_descriptions(
+                    db, connection, table_name, tracked_columns, model_id, additional_instructions
+                )
+                return table_name, descriptions
+        
+        tasks = [asyncio.ensure_future(_generate(name, cols)) for name, cols in table_columns.items()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
     async def _generate_table_column_descriptions(
         self,
         db: AsyncSession,
@@ -517,8 +689,6 @@ class TrainingService:
     ) -> Dict[str, str]:
         """Generate AI descriptions for all columns in a table"""
         try:
-            client = self._get_openai_client()
-            
             # Get all columns for the table
             columns = await connection_service.get_table_columns(
                 db=db,
@@ -532,10 +702,10 @@ class TrainingService:
             # Build prompt for table column descriptions
             prompt = self._build_table_column_descriptions_prompt(table_name, columns)
             
-            response = client.chat.completions.create(
+            response = await self._create_chat_completion(
                 model=settings.OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are a database expert specializing in Microsoft SQL Server. Generate clear, concise descriptions for database columns."},
+                    _COLUMN_DESCRIPTION_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
@@ -554,8 +724,7 @@ class TrainingService:
         """Build prompt for single column description generation"""
         template_path = "app/prompts/training/column_description.txt"
         try:
-            with open(template_path, 'r') as f:
-                template = f.read()
+            template = _load_prompt_template(template_path)
         except FileNotFoundError:
             logger.error(f"Prompt template not found: {template_path}")
             raise FileNotFoundError(f"Prompt template not found: {template_path}")
@@ -588,23 +757,13 @@ class TrainingService:
         """Build prompt for table column descriptions generation"""
         template_path = "app/prompts/training/table_column_descriptions.txt"
         try:
-            with open(template_path, 'r') as f:
-                template = f.read()
+            template = _load_prompt_template(template_path)
         except FileNotFoundError:
             logger.error(f"Prompt template not found: {template_path}")
             raise FileNotFoundError(f"Prompt template not found: {template_path}")
         
         # Build columns text with value information
-        columns_with_values = []
-        for col in columns:
-            # Get value information from stored data
-            value_info = self._get_column_value_info(col)
-            value_text = f" - Values: {value_info}" if value_info else ""
-            columns_with_values.append(
-                f"- {col['column_name']} ({col['data_type']}) - Nullable: {col.get('is_nullable', 'Unknown')}{value_text}"
-            )
-        
-        columns_text = "\n".join(columns_with_values)
+        columns_text = "\n".join(map(self._format_column_prompt_line, columns))
         
         additional_instructions_placeholder = f"\nAdditional Instructions:\n{additional_instructions}" if additional_instructions else ""
         
@@ -735,77 +894,45 @@ class TrainingService:
     def _get_column_value_info(self, column_info: Dict[str, Any]) -> str:
         """Get value information for a column from stored data"""
         try:
-            # Debug logging to see what data we're working with
-            logger.info(f"🔍 Column value info for {column_info.get('column_name', 'unknown')}: value_categories={column_info.get('value_categories')}, distinct_count={column_info.get('value_distinct_count')}, is_low_cardinality={column_info.get('is_low_cardinality')}")
-            
-            # Check if we have stored value categories
-            if column_info.get('value_categories') and isinstance(column_info['value_categories'], list) and len(column_info['value_categories']) > 0:
-                categories = column_info['value_categories']
-                distinct_count = column_info.get('value_distinct_count', len(categories))
-                
-                # For low-cardinality categorical columns (30 or fewer), show ALL values
-                if column_info.get('is_low_cardinality', False) and distinct_count <= 30:
-                    result = f"Categories ({distinct_count} distinct): {', '.join(map(str, categories))}"
-                    logger.info(f"🔍 Generated low-cardinality value info: {result}")
-                    return result
-                else:
-                    # For all categorical columns, show the categories
-                    result = f"Categories ({distinct_count} distinct): {', '.join(map(str, categories))}"
-                    logger.info(f"🔍 Generated categorical value info: {result}")
-                    return result
-            
-            # Check if we have stored range information (numerical data)
-            if column_info.get('value_range_min') or column_info.get('value_range_max'):
-                min_val = column_info.get('value_range_min')
-                max_val = column_info.get('value_range_max')
-                distinct_count = column_info.get('value_distinct_count', 0)
-                
-                if min_val and max_val:
-                    result = f"Range: {min_val} to {max_val} ({distinct_count} distinct values)"
-                    logger.info(f"🔍 Generated range value info: {result}")
-                    return result
-                elif min_val:
-                    result = f"Min: {min_val} ({distinct_count} distinct values)"
-                    logger.info(f"🔍 Generated min value info: {result}")
-                    return result
-                elif max_val:
-                    result = f"Max: {max_val} ({distinct_count} distinct values)"
-                    logger.info(f"🔍 Generated max value info: {result}")
-                    return result
-            
-            # Check if we have distinct count but no other info
-            if column_info.get('value_distinct_count') and column_info['value_distinct_count'] > 0:
-                result = f"Distinct values: {column_info['value_distinct_count']}"
-                logger.info(f"🔍 Generated distinct count value info: {result}")
-                return result
-            
-            logger.info(f"🔍 No value info found for column {column_info.get('column_name', 'unknown')}")
-            return ""
+            categories = column_info.get('value_categories')
+            categories = tuple(map(str, categories)) if isinstance(categories, list) else ()
+            
+            # Memoized on the value fields, so repeated prompt builds reuse the formatted text
+            return _format_column_value_info(
+                categories,
+                column_info.get('value_distinct_count', len(categories)),
+                column_info.get('value_range_min'),
+                column_info.get('value_range_max')
+            )
             
         except Exception as e:
             logger.error(f"Failed to get column value info: {e}")
             return ""
     
+    def _format_column_prompt_line(self, col: Dict[str, Any]) -> str:
+        """Format a single column line for the table column descriptions prompt"""
+        value_info = self._get_column_value_info(col)
+        value_text = f" - Values: {value_info}" if value_info else ""
+        return f"- {col['column_name']} ({col['data_type']}) - Nullable: {col.get('is_nullable', 'Unknown')}{value_text}"
+    
     def _parse_column_descriptions_response(self, response: str, columns: List[Dict[str, Any]]) -> Dict[str, str]:
         """Parse AI response to extract column descriptions"""
         descriptions = {}
-        lines = response.strip().split('\n')
         
         current_column = None
         current_description = None
         
-        for line in lines:
-            line = line.strip()
-            if line.startswith('Column:'):
+        for label, value in _COLUMN_DESCRIPTION_LINE_RE.findall(response):
+            if label == 'Column':
                 # Save previous description if exists
                 if current_column and current_description:
                     descriptions[current_column] = current_description
                 
-                current_column = line.replace('Column:', '').strip()
+                current_column = value.strip()
                 current_description = None
                 
-            elif line.startswith('Description:'):
-                current_description = line.replace('Description:', '').strip()
+            else:
+                current_description = value.strip()
         
         # Add last description
         if current_column and current_description:
@@ -829,30 +956,20 @@ class TrainingService:
     ):
         """Update tracked column description with AI-generated description"""
         try:
-            # Find the tracked table for this model and table name
-            stmt = select(ModelTrackedTable).where(
+            # Resolve the tracked table and update the column in a single statement
+            tracked_table_ids = select(ModelTrackedTable.id).where(
                 ModelTrackedTable.model_id == model_id,
                 ModelTrackedTable.table_name == table_name
             )
-            result = await db.execute(stmt)
-            tracked_table = result.scalar_one_or_none()
-            
-            if not tracked_table:
-                logger.error(f"Tracked table not found for model {model_id}, table {table_name}")
-                return
-            
-            # Find the tracked column
-            stmt = select(ModelTrackedColumn).where(
-                ModelTrackedColumn.model_tracked_table_id == tracked_table.id,
+            stmt = update(ModelTrackedColumn).where(
+                ModelTrackedColumn.model_tracked_table_id.in_(tracked_table_ids),
                 ModelTrackedColumn.column_name == column_name
-            )
+            ).values(description=description).returning(ModelTrackedColumn.id)
             result = await db.execute(stmt)
-            tracked_column = result.scalar_one_or_none()
+            updated_ids = result.scalars().all()
+            await db.commit()
             
-            if tracked_column:
-                # Update the tracked column description
-                tracked_column.description = description
-                await db.commit()
+            if updated_ids:
                 logger.info(f"Updated description for column {column_name} in table {table_name}")
             else:
                 logger.error(f"Tracked column not found: {column_name} in table {table_name}")
@@ -861,6 +978,42 @@ class TrainingService:
             logger.error(f"Failed to update column description: {e}")
             await db.rollback()
     
+    async def _update_table_column_descriptions(
+        self,
+        db: AsyncSession,
+        model_id: str,
+        table_name: str,
+        descriptions: Dict[str, str]
+    ):
+        """Update tracked column descriptions for a whole table with one lookup and one commit"""
+        if not descriptions:
+            return
+        try:
+            # Load every affected tracked column at once and index it by name
+            stmt = select(ModelTrackedColumn).join(
+                ModelTrackedTable, ModelTrackedColumn.model_tracked_table_id == ModelTrackedTable.id
+            ).where(
+                ModelTrackedTable.model_id == model_id,
+                ModelTrackedTable.table_name == table_name,
+                ModelTrackedColumn.column_name.in_(list(descriptions.keys()))
+            )
+            result = await db.execute(stmt)
+            columns_by_name = {col.column_name: col for col in result.scalars().all()}
+            
+            for column_name, description in descriptions.items():
+                tracked_column = columns_by_name.get(column_name)
+                if tracked_column:
+                    tracked_column.description = description
+                else:
+                    logger.error(f"Tracked column not found: {column_name} in table {table_name}")
+            
+            await db.commit()
+            logger.info(f"Updated {len(columns_by_name)} column descriptions in table {table_name}")
+            
+        except Exception as e:
+            logger.error(f"Failed to update column descriptions for table {table_name}: {e}")
+            await db.rollback()
+    
     async def _get_stored_column_value_info(self, db: AsyncSession, model_id: str, table_name: str, column_name: str) -> Dict[str, Any]:
         """Get stored value information for a column from tracked columns"""
         try:
@@ -910,52 +1063,24 @@ class TrainingService:
     ):
         """Update column value information in the database"""
         try:
-            # Find the tracked table for this model and table name
-            stmt = select(ModelTrackedTable).where(
+            fields = column_fields_from_value_analysis(value_analysis)
+            if not fields:
+                return
+            
+            # Resolve the tracked table and update the column in a single statement
+            tracked_table_ids = select(ModelTrackedTable.id).where(
                 ModelTrackedTable.model_id == model_id,
                 ModelTrackedTable.table_name == table_name
             )
-            result = await db.execute(stmt)
-            tracked_table = result.scalar_one_or_none()
-            
-            if not tracked_table:
-                logger.error(f"Tracked table not found for model {model_id}, table {table_name}")
-                return
-            
-            # Find the tracked column
-            stmt = select(ModelTrackedColumn).where(
-                ModelTrackedColumn.model_tracked_table_id == tracked_table.id,
+            stmt = update(ModelTrackedColumn).where(
+                ModelTrackedColumn.model_tracked_table_id.in_(tracked_table_ids),
                 ModelTrackedColumn.column_name == column_name
-            )
+            ).values(**fields).returning(ModelTrackedColumn.id)
             result = await db.execute(stmt)
-            tracked_column = result.scalar_one_or_none()
+            updated_ids = result.scalars().all()
+            await db.commit()
             
-            if tracked_column:
-                # Update value information fields
-                if 'categories' in value_analysis:
-                    tracked_column.value_categories = value_analysis['categories']
-                if 'range' in value_analysis:
-                    tracked_column.value_range_min = str(value_analysis['range'].get('min', ''))
-                    tracked_column.value_range_max = str(value_analysis['range'].get('max', ''))
-                if 'date_range' in value_analysis:
-                    tracked_column.value_range_min = value_analysis['date_range'].get('start', '')
-                    tracked_column.value_range_max = value_analysis['date_range'].get('end', '')
-                if 'distinct_count' in value_analysis:
-                    tracked_column.value_distinct_count = value_analysis['distinct_count']
-                if 'is_categorical' in value_analysis:
-                    tracked_column.value_data_type = 'categorical'
-                    # Store low-cardinality flag for categorical columns with 30 or fewer distinct values
-                    if value_analysis.get('is_low_cardinality', False):
-                        tracked_column.value_is_low_cardinality = True
-                elif 'is_numerical' in value_analysis:
-                    tracked_column.value_data_type = 'numerical'
-                elif 'is_temporal' in value_analysis:
-                    tracked_column.value_data_type = 'temporal'
-                elif 'is_high_cardinality' in value_analysis:
-                    tracked_column.value_data_type = 'high_cardinality'
-                    tracked_column.value_sample_size = value_analysis.get('sample_size', 20)
-                
-                await db.commit()
+            if updated_ids:
                 logger.info(f"Updated value information for {table_name}.{column_name}")
             else:
                 logger.warning(f"Tracked column not found: {table_name}.{column_name}")
@@ -1095,17 +1220,15 @@ class TrainingService:
     ) -> List[Dict[str, Any]]:
         """Generate training examples using AI"""
         try:
-            client = self._get_openai_client()
-            
             # Build prompt for AI
             prompt = self._build_example_generation_prompt(table_name, column_info, num_examples)
             
             await sse_logger.info(f"Generating {num_examples} examples using AI...")
             
-            response = client.chat.completions.create(
+            response = await self._create_chat_completion(
                 model=settings.OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are a SQL expert specializing in Microsoft SQL Server."},
+                    _EXAMPLE_GENERATION_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
@@ -1129,17 +1252,15 @@ class TrainingService:
     ) -> List[Dict[str, Any]]:
         """Generate cross-table examples using AI"""
         try:
-            client = self._get_openai_client()
-            
             # Build cross-table prompt
             prompt = self._build_cross_table_prompt(table_names, num_examples)
             
             await sse_logger.info(f"Generating {num_examples} cross-table examples using AI...")
             
-            response = client.chat.completions.create(
+            response = await self._create_chat_completion(
                 model=settings.OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are a SQL expert specializing in Microsoft SQL Server joins and cross-table queries."},
+                    _CROSS_TABLE_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
@@ -1162,8 +1283,7 @@ class TrainingService:
             for col in column_info
         ])
         
-        with open("app/prompts/training/example_generation.txt", 'r') as f:
-            template = f.read()
+        template = _load_prompt_template("app/prompts/training/example_generation.txt")
         
         return template.format(
             table_name=table_name,
@@ -1175,8 +1295,7 @@ class TrainingService:
         """Build prompt for cross-table example generation"""
         tables_text = "\n".join([f"- {table}" for table in table_names])
         
-        with open("app/prompts/training/cross_table_generation.txt", 'r') as f:
-            template = f.read()
+        template = _load_prompt_template("app/prompts/training/cross_table_generation.txt")
         
         return template.format(
             tables_text=tables_text,
@@ -1186,14 +1305,12 @@ class TrainingService:
     def _parse_ai_examples_response(self, response: str) -> List[Dict[str, Any]]:
         """Parse AI response into structured examples"""
         examples = []
-        lines = response.strip().split('\n')
         
         current_question = None
         current_sql = None
         
-        for line in lines:
-            line = line.strip()
-            if line.startswith('Question:'):
+        for label, value in _EXAMPLE_LINE_RE.findall(response):
+            if label == 'Question':
                 # Save previous example if exists
                 if current_question and current_sql:
                     examples.append({
@@ -1201,11 +1318,11 @@ class TrainingService:
                         "sql": current_sql
                     })
                 
-                current_question = line.replace('Question:', '').strip()
+                current_question = value.strip()
                 current_sql = None
                 
-            elif line.startswith('SQL:'):
-                current_sql = line.replace('SQL:', '').strip()
+            else:
+                current_sql = value.strip()
         
         # Add last example
         if current_question and current_sql:
@@ -1219,20 +1336,17 @@ class TrainingService:
     async def _save_training_examples(self, db: AsyncSession, model_id: str, table_name: str, examples: List[Dict[str, Any]]) -> int:
         """Save training examples to database"""
         try:
-            saved_count = 0
+            values = [
+                {"model_id": model_id, "question": example["question"], "sql": example["sql"]}
+                for example in examples
+            ]
             
-            for example in examples:
-                training_question = ModelTrainingQuestion(
-                    model_id=model_id,
-                    question=example["question"],
-                    sql=example["sql"]
-                )
-                
-                db.add(training_question)
-                saved_count += 1
+            # One multi-row INSERT instead of a flush per object
+            if values:
+                await db.execute(insert(ModelTrainingQuestion), values)
             
             await db.commit()
-            return saved_count
+            return len(values)
             
         except Exception as e:
             await db.rollback()
@@ -1263,17 +1377,7 @@ class TrainingService:
             docs = result.scalars().all()
             
             return [
-                ModelTrainingDocumentationResponse(
-                    id=str(doc.id),
-                    model_id=str(doc.model_id),
-                    title=doc.title,
-                    doc_type=doc.doc_type,
-                    content=doc.content,
-                    category=doc.category,
-                    order_index=doc.order_index,
-                    created_at=doc.created_at,
-                    updated_at=doc.updated_at
-                )
+                ModelTrainingDocumentationResponse.model_validate(doc)
                 for doc in docs
             ]
         except Exception as e:
@@ -1288,30 +1392,20 @@ class TrainingService:
     ) -> ModelTrainingDocumentationResponse:
         """Create new training documentation"""
         try:
-            doc = ModelTrainingDocumentation(
+            # RETURNING hands back server defaults (created_at, ...) without a refresh SELECT
+            stmt = insert(ModelTrainingDocumentation).values(
                 model_id=model_id,
                 title=doc_data.title,
                 doc_type=doc_data.doc_type,
                 content=doc_data.content,
                 category=doc_data.category,
                 order_index=doc_data.order_index
-            )
+            ).returning(ModelTrainingDocumentation)
             
-            db.add(doc)
+            doc = (await db.execute(stmt)).scalar_one()
             await db.commit()
-            await db.refresh(doc)
-            
-            return ModelTrainingDocumentationResponse(
-                id=str(doc.id),
-                model_id=str(doc.model_id),
-                title=doc.title,
-                doc_type=doc.doc_type,
-                content=doc.content,
-                category=doc.category,
-                order_index=doc.order_index,
-                created_at=doc.created_at,
-                updated_at=doc.updated_at
-            )
+            
+            return ModelTrainingDocumentationResponse.model_validate(doc)
         except Exception as e:
             await db.rollback()
             logger.error(f"Failed to create training documentation: {e}")
@@ -1325,39 +1419,24 @@ class TrainingService:
     ) -> Optional[ModelTrainingDocumentationResponse]:
         """Update training documentation"""
         try:
-            stmt = select(ModelTrainingDocumentation).where(ModelTrainingDocumentation.id == doc_id)
-            result = await db.execute(stmt)
-            doc = result.scalar_one_or_none()
+            # Only provided fields are updated
+            fields = doc_data.dict(exclude_none=True)
+            
+            if fields:
+                stmt = update(ModelTrainingDocumentation).where(
+                    ModelTrainingDocumentation.id == doc_id
+                ).values(**fields).returning(ModelTrainingDocumentation)
+            else:
+                stmt = select(ModelTrainingDocumentation).where(ModelTrainingDocumentation.id == doc_id)
+            
+            doc = (await db.execute(stmt)).scalar_one_or_none()
             
             if not doc:
                 return None
             
-            # Update fields
-            if doc_data.title is not None:
-                doc.title = doc_data.title
-            if doc_data.doc_type is not None:
-                doc.doc_type = doc_data.doc_type
-            if doc_data.content is not None:
-                doc.content = doc_data.content
-            if doc_data.category is not None:
-                doc.category = doc_data.category
-            if doc_data.order_index is not None:
-                doc.order_index = doc_data.order_index
-            
             await db.commit()
-            await db.refresh(doc)
-            
-            return ModelTrainingDocumentationResponse(
-                id=str(doc.id),
-                model_id=str(doc.model_id),
-                title=doc.title,
-                doc_type=doc.doc_type,
-                content=doc.content,
-                category=doc.category,
-                order_index=doc.order_index,
-                created_at=doc.created_at,
-                updated_at=doc.updated_at
-            )
+            
+            return ModelTrainingDocumentationResponse.model_validate(doc)
         except Exception as e:
             await db.rollback()
             logger.error(f"Failed to update training documentation: {e}")
@@ -1387,20 +1466,7 @@ class TrainingService:
             questions = result.scalars().all()
             
             return [
-                ModelTrainingQuestionResponse(
-                    id=q.id,
-                    model_id=q.model_id,
-                    question=q.question,
-                    sql=q.sql,
-                    involved_columns=q.involved_columns,
-                    query_type=q.query_type,
-                    difficulty=q.difficulty,
-                    generated_by=q.generated_by,
-                    is_validated=q.is_validated,
-                    validation_notes=q.validation_notes,
-                    created_at=q.created_at,
-                    updated_at=q.updated_at
-                )
+                ModelTrainingQuestionResponse.model_validate(q)
                 for q in questions
             ]
         except Exception as e:
@@ -1415,7 +1481,7 @@ class TrainingService:
     ) -> ModelTrainingQuestionResponse:
         """Create new training question"""
         try:
-            question = ModelTrainingQuestion(
+            stmt = insert(ModelTrainingQuestion).values(
                 model_id=model_id,
                 question=question_data.question,
                 sql=question_data.sql,
@@ -1425,26 +1491,12 @@ class TrainingService:
                 generated_by=question_data.generated_by,
                 is_validated=question_data.is_validated,
                 validation_notes=question_data.validation_notes
-            )
+            ).returning(ModelTrainingQuestion)
             
-            db.add(question)
+            question = (await db.execute(stmt)).scalar_one()
             await db.commit()
-            await db.refresh(question)
-            
-            return ModelTrainingQuestionResponse(
-                id=str(question.id),
-                model_id=str(question.model_id),
-                question=question.question,
-                sql=question.sql,
-                involved_columns=question.involved_columns,
-                query_type=question.query_type,
-                difficulty=question.difficulty,
-                generated_by=question.generated_by,
-                is_validated=question.is_validated,
-                validation_notes=question.validation_notes,
-                created_at=question.created_at,
-                updated_at=question.updated_at
-            )
+            
+            return ModelTrainingQuestionResponse.model_validate(question)
         except Exception as e:
             await db.rollback()
             logger.error(f"Failed to create training question: {e}")
@@ -1458,48 +1510,24 @@ class TrainingService:
     ) -> Optional[ModelTrainingQuestionResponse]:
         """Update training question"""
         try:
-            stmt = select(ModelTrainingQuestion).where(ModelTrainingQuestion.id == question_id)
-            result = await db.execute(stmt)
-            question = result.scalar_one_or_none()
+            # Only provided fields are updated
+            fields = question_data.dict(exclude_none=True)
+            
+            if fields:
+                stmt = update(ModelTrainingQuestion).where(
+                    ModelTrainingQuestion.id == question_id
+                ).values(**fields).returning(ModelTrainingQuestion)
+            else:
+                stmt = select(ModelTrainingQuestion).where(ModelTrainingQuestion.id == question_id)
+            
+            question = (await db.execute(stmt)).scalar_one_or_none()
             
             if not question:
                 return None
             
-            # Update fields
-            if question_data.question is not None:
-                question.question = question_data.question
-            if question_data.sql is not None:
-                question.sql = question_data.sql
-            if question_data.involved_columns is not None:
-                question.involved_columns = question_data.involved_columns
-            if question_data.query_type is not None:
-                question.query_type = question_data.query_type
-            if question_data.difficulty is not None:
-                question.difficulty = question_data.difficulty
-            if question_data.generated_by is not None:
-                question.generated_by = question_data.generated_by
-            if question_data.is_validated is not None:
-                question.is_validated = question_data.is_validated
-            if question_data.validation_notes is not None:
-                question.validation_notes = question_data.validation_notes
-            
             await db.commit()
-            await db.refresh(question)
-            
-            return ModelTrainingQuestionResponse(
-                id=str(question.id),
-                model_id=str(question.model_id),
-                question=question.question,
-                sql=question.sql,
-                involved_columns=question.involved_columns,
-                query_type=question.query_type,
-                difficulty=question.difficulty,
-                generated_by=question.generated_by,
-                is_validated=question.is_validated,
-                validation_notes=question.validation_notes,
-                created_at=question.created_at,
-                updated_at=question.updated_at
-            )
+            
+            return ModelTrainingQuestionResponse.model_validate(question)
         except Exception as e:
             await db.rollback()
             logger.error(f"Failed to update training question: {e}")
@@ -1526,21 +1554,20 @@ class TrainingService:
     ) -> Dict[str, Any]:
         """Validate a training question by executing the SQL query"""
         try:
-            # Get the question
-            stmt = select(ModelTrainingQuestion).where(ModelTrainingQuestion.id == question_id)
+            # Get the question together with its model (for connection information)
+            stmt = select(ModelTrainingQuestion, Model).outerjoin(
+                Model, Model.id == ModelTrainingQuestion.model_id
+            ).where(ModelTrainingQuestion.id == question_id)
             result = await db.execute(stmt)
-            question = result.scalar_one_or_none()
+            row = result.one_or_none()
             
-            if not question:
+            if not row:
                 return {
                     "success": False,
                     "error_message": "Question not found"
                 }
             
-            # Get the model to access connection information
-            stmt = select(Model).where(Model.id == question.model_id)
-            result = await db.execute(stmt)
-            model = result.scalar_one_or_none()
+            question, model = row
             
             if not model:
                 return {
@@ -1665,7 +1692,7 @@ class TrainingService:
             
             return [
                 ModelTrainingColumnResponse(
-                    id=str(col.id),
+                    id=col.id,
                     model_id=model_id,
                     table_name=table.table_name,
                     column_name=col.column_name,
@@ -1691,7 +1718,7 @@ class TrainingService:
     ) -> ModelTrainingColumnResponse:
         """Create new training column"""
         try:
-            column = ModelTrainingColumn(
+            stmt = insert(ModelTrainingColumn).values(
                 model_id=model_id,
                 table_name=column_data.table_name,
                 column_name=column_data.column_name,
@@ -1700,25 +1727,12 @@ class TrainingService:
                 value_range=column_data.value_range,
                 description_source=column_data.description_source,
                 is_active=column_data.is_active
-            )
+            ).returning(ModelTrainingColumn)
             
-            db.add(column)
+            column = (await db.execute(stmt)).scalar_one()
             await db.commit()
-            await db.refresh(column)
-            
-            return ModelTrainingColumnResponse(
-                id=str(column.id),
-                model_id=str(column.model_id),
-                table_name=column.table_name,
-                column_name=column.column_name,
-                data_type=column.data_type,
-                description=column.description,
-                value_range=column.value_range,
-                description_source=column.description_source,
-                is_active=column.is_active,
-                created_at=column.created_at,
-                updated_at=column.updated_at
-            )
+            
+            return ModelTrainingColumnResponse.model_validate(column)
         except Exception as e:
             await db.rollback()
             logger.error(f"Failed to create training column: {e}")
@@ -1732,26 +1746,29 @@ class TrainingService:
     ) -> Optional[Dict[str, Any]]:
         """Update tracked column description"""
         try:
-            stmt = select(ModelTrackedColumn).where(ModelTrackedColumn.id == column_id)
-            result = await db.execute(stmt)
-            column = result.scalar_one_or_none()
+            # Update the description and read back the column with its table name in one statement
+            table_name = select(ModelTrackedTable.table_name).where(
+                ModelTrackedTable.id == ModelTrackedColumn.model_tracked_table_id
+            ).scalar_subquery()
+            stmt = update(ModelTrackedColumn).where(
+                ModelTrackedColumn.id == column_id
+            ).values(description=description).returning(
+                ModelTrackedColumn.id,
+                ModelTrackedColumn.column_name,
+                ModelTrackedColumn.description,
+                ModelTrackedColumn.created_at,
+                table_name.label("table_name")
+            )
+            column = (await db.execute(stmt)).one_or_none()
             
             if not column:
                 return None
             
-            # Update description
-            column.description = description
             await db.commit()
-            await db.refresh(column)
-            
-            # Get the tracked table info
-            stmt = select(ModelTrackedTable).where(ModelTrackedTable.id == column.model_tracked_table_id)
-            result = await db.execute(stmt)
-            tracked_table = result.scalar_one_or_none()
             
             return {
                 "id": str(column.id),
-                "table_name": tracked_table.table_name if tracked_table else "Unknown",
+                "table_name": column.table_name or "Unknown",
                 "column_name": column.column_name,
                 "data_type": "Unknown",
                 "description": column.description,
@@ -1771,45 +1788,24 @@ class TrainingService:
     ) -> Optional[ModelTrainingColumnResponse]:
         """Update training column"""
         try:
-            stmt = select(ModelTrainingColumn).where(ModelTrainingColumn.id == column_id)
-            result = await db.execute(stmt)
-            column = result.scalar_one_or_none()
+            # Only provided fields are updated
+            fields = column_data.dict(exclude_none=True)
+            
+            if fields:
+                stmt = update(ModelTrainingColumn).where(
+                    ModelTrainingColumn.id == column_id
+                ).values(**fields).returning(ModelTrainingColumn)
+            else:
+                stmt = select(ModelTrainingColumn).where(ModelTrainingColumn.id == column_id)
+            
+            column = (await db.execute(stmt)).scalar_one_or_none()
             
             if not column:
                 return None
             
-            # Update fields
-            if column_data.table_name is not None:
-                column.table_name = column_data.table_name
-            if column_data.column_name is not None:
-                column.column_name = column_data.column_name
-            if column_data.data_type is not None:
-                column.data_type = column_data.data_type
-            if column_data.description is not None:
-                column.description = column_data.description
-            if column_data.value_range is not None:
-                column.value_range = column_data.value_range
-            if column_data.description_source is not None:
-                column.description_source = column_data.description_source
-            if column_data.is_active is not None:
-                column.is_active = column_data.is_active
-            
             await db.commit()
-            await db.refresh(column)
-            
-            return ModelTrainingColumnResponse(
-                id=str(column.id),
-                model_id=str(column.model_id),
-                table_name=column.table_name,
-                column_name=column.column_name,
-                data_type=column.data_type,
-                description=column.description,
-                value_range=column.value_range,
-                description_source=column.description_source,
-                is_active=column.is_active,
-                created_at=column.created_at,
-                updated_at=column.updated_at
-            )
+            
+            return ModelTrainingColumnResponse.model_validate(column)
         except Exception as e:
             await db.rollback()
             logger.error(f"Failed to update training column: {e}")
@@ -1839,11 +1835,37 @@ class TrainingService:
             if not model:
                 return {}
             
-            # Get training questions
-            questions = await self.get_model_training_questions(db, model_id)
+            # Get training questions, selecting only the returned fields as plain rows
+            stmt = select(
+                ModelTrainingQuestion.id,
+                ModelTrainingQuestion.question,
+                ModelTrainingQuestion.sql,
+                ModelTrainingQuestion.involved_columns,
+                ModelTrainingQuestion.query_type,
+                ModelTrainingQuestion.difficulty,
+                ModelTrainingQuestion.generated_by,
+                ModelTrainingQuestion.is_validated,
+                ModelTrainingQuestion.validation_notes,
+                ModelTrainingQuestion.created_at
+            ).where(
+                ModelTrainingQuestion.model_id == model_id
+            ).order_by(ModelTrainingQuestion.created_at.desc())
+            result = await db.execute(stmt)
+            questions = [_row_to_response_dict(row) for row in result]
             
             # Get training documentation
-            documentation = await self.get_model_training_documentation(db, model_id)
+            stmt = select(
+                ModelTrainingDocumentation.id,
+                ModelTrainingDocumentation.title,
+                ModelTrainingDocumentation.content,
+                ModelTrainingDocumentation.doc_type,
+                ModelTrainingDocumentation.category,
+                ModelTrainingDocumentation.created_at
+            ).where(
+                ModelTrainingDocumentation.model_id == model_id
+            ).order_by(ModelTrainingDocumentation.order_index)
+            result = await db.execute(stmt)
+            documentation = [_row_to_response_dict(row) for row in result]
             
             # Get tracked columns (only tracked ones)
             columns = await self._get_all_tracked_columns_for_model(db, model_id)
@@ -1852,30 +1874,8 @@ class TrainingService:
                 "model_id": str(model_id),
                 "model_name": model.name,
                 "model_status": model.status,
-                "questions": [
-                    {
-                        "id": q.id,
-                        "question": q.question,
-                        "sql": q.sql,
-                        "involved_columns": q.involved_columns,
-                        "query_type": q.query_type,
-                        "difficulty": q.difficulty,
-                        "generated_by": q.generated_by,
-                        "is_validated": q.is_validated,
-                        "validation_notes": q.validation_notes,
-                        "created_at": q.created_at.isoformat() if q.created_at else None
-                    } for q in questions
-                ],
-                "documentation": [
-                    {
-                        "id": d.id,
-                        "title": d.title,
-                        "content": d.content,
-                        "doc_type": d.doc_type,
-                        "category": d.category,
-                        "created_at": d.created_at.isoformat() if d.created_at else None
-                    } for d in documentation
-                ],
+                "questions": questions,
+                "documentation": documentation,
                 "columns": columns,
                 "total_questions": len(questions),
                 "total_documentation": len(documentation),
@@ -2145,11 +2145,11 @@ class TrainingService:
         columns = scope_config.get('columns', {})
         num_questions = scope_config.get('num_questions', 20)
         
-        # Get tracked tables and columns
-        tracked_data = await self._get_tracked_tables_and_columns(db, model_id, tables)
+        # Get tracked tables and the in-scope columns
+        tracked_data = await self._get_tracked_tables_and_columns(db, model_id, tables, columns)
         
         # Build schema information
-        schema_info = self._build_schema_info_for_scope(tracked_data, columns)
+        schema_info = self._build_schema_info_for_scope(tracked_data)
         
         return {
             'type': scope_type,
@@ -2164,9 +2164,10 @@ class TrainingService:
         self,
         db: AsyncSession,
         model_id: str,
-        tables: List[str]
+        tables: List[str],
+        columns: Optional[Dict[str, List[str]]] = None
     ) -> Dict[str, Any]:
-        """Get tracked tables and their columns for the model"""
+        """Get tracked tables and their columns for the model, limited to the requested columns per table"""
         
         # Get tracked tables
         query = select(ModelTrackedTable).where(
@@ -2182,29 +2183,53 @@ class TrainingService:
         result = await db.execute(query)
         tracked_tables = result.scalars().all()
         
-        # Get columns for each table
         table_data = {}
+        tables_by_id = {}
         for table in tracked_tables:
-            columns_query = select(ModelTrackedColumn).where(
-                and_(
-                    ModelTrackedColumn.model_tracked_table_id == table.id,
-                    ModelTrackedColumn.is_tracked == True
-                )
-            )
-            columns_result = await db.execute(columns_query)
-            columns = columns_result.scalars().all()
-            
             table_data[table.table_name] = {
                 'table': table,
-                'columns': columns
+                'columns': []
             }
+            tables_by_id[table.id] = table
+        
+        if not tracked_tables:
+            return table_data
+        
+        # Get columns for all tables in one query
+        columns_query = select(ModelTrackedColumn).where(
+            and_(
+                ModelTrackedColumn.model_tracked_table_id.in_(list(tables_by_id.keys())),
+                ModelTrackedColumn.is_tracked == True
+            )
+        )
+        
+        # Filter in SQL when specific columns are requested for some tables
+        if columns:
+            columns_query = columns_query.join(
+                ModelTrackedTable, ModelTrackedColumn.model_tracked_table_id == ModelTrackedTable.id
+            ).where(
+                or_(
+                    ModelTrackedTable.table_name.notin_(list(columns.keys())),
+                    *[
+                        and_(
+                            ModelTrackedTable.table_name == table_name,
+                            ModelTrackedColumn.column_name.in_(table_columns)
+                        )
+                        for table_name, table_columns in columns.items()
+                    ]
+                )
+            )
+        
+        columns_result = await db.execute(columns_query)
+        for column in columns_result.scalars().all():
+            table = tables_by_id[column.model_tracked_table_id]
+            table_data[table.table_name]['columns'].append(column)
         
         return table_data
 
     def _build_schema_info_for_scope(
         self,
-        tracked_data: Dict[str, Any],
-        columns: Dict[str, List[str]]
+        tracked_data: Dict[str, Any]
     ) -> str:
         """Build detailed schema information for prompt"""
         
@@ -2212,13 +2237,8 @@ class TrainingService:
         
         for table_name, table_info in tracked_data.items():
             table = table_info['table']
-            all_columns = table_info['columns']
-            
-            # Filter columns if specific columns are requested
-            if table_name in columns:
-                selected_columns = [col for col in all_columns if col.column_name in columns[table_name]]
-            else:
-                selected_columns = all_columns
+            # Columns are already limited to the requested ones by _get_tracked_tables_and_columns
+            selected_columns = table_info['columns']
             
             schema_lines.append(f"\nTable: {table_name}")
             if table.schema_name:
@@ -2284,12 +2304,10 @@ class TrainingService:
         # Load template file
         template_path = f"app/prompts/training/{template_name}.txt"
         try:
-            with open(template_path, 'r') as f:
-                template = f.read()
+            template = _load_prompt_template(template_path)
         except FileNotFoundError:
             # Fallback to single_table template
-            with open("app/prompts/training/single_table.txt", 'r') as f:
-                template = f.read()
+            template = _load_prompt_template("app/prompts/training/single_table.txt")
         
         # Format columns list
         columns_list = self._format_columns_list(scope_config['columns'])
@@ -2332,12 +2350,10 @@ class TrainingService:
     async def _generate_structured_questions(self, prompt: str) -> Dict[str, Any]:
         """Generate questions with structured JSON response"""
         
-        client = self._get_openai_client()
-        
         # Load system prompt
         system_prompt = self._load_system_prompt()
         
-        response = client.chat.completions.create(
+        response = await self._create_chat_completion(
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -2354,14 +2370,14 @@ class TrainingService:
         logger.info(f"Raw LLM response: {content}")
         
         try:
-            parsed_response = json.loads(content)
+            parsed_response = orjson.loads(content)
             logger.info(f"Parsed response keys: {list(parsed_response.keys())}")
             if 'questions' in parsed_response:
                 logger.info(f"Number of questions: {len(parsed_response['questions'])}")
                 for i, q in enumerate(parsed_response['questions']):
                     logger.info(f"Question {i+1} keys: {list(q.keys())}")
             return parsed_response
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON decode error: {e}")
             logger.error(f"Raw content: {content}")
             raise
@@ -2369,8 +2385,7 @@ class TrainingService:
     def _load_system_prompt(self) -> str:
         """Load the base system prompt"""
         try:
-            with open("app/prompts/training/base_system.txt", 'r') as f:
-                return f.read()
+            return _load_prompt_template("app/prompts/training/base_system.txt")
         except FileNotFoundError:
             return "You are an expert SQL query generator specializing in Microsoft SQL Server syntax."
 
@@ -2494,30 +2509,31 @@ class TrainingService:
     ) -> int:
         """Save structured questions with column associations"""
         
-        saved_count = 0
+        values = []
         
         for question_data in questions:
             try:
-                training_question = ModelTrainingQuestion(
-                    model_id=model_id,
-                    question=question_data["question"],
-                    sql=question_data["sql"],
-                    involved_columns=question_data["involved_columns"],
-                    query_type=question_data.get("query_type", "unknown"),
-                    difficulty=question_data.get("difficulty", "medium"),
-                    generated_by="ai",
-                    is_validated=False
-                )
-                
-                db.add(training_question)
-                saved_count += 1
+                values.append({
+                    "model_id": model_id,
+                    "question": question_data["question"],
+                    "sql": question_data["sql"],
+                    "involved_columns": question_data["involved_columns"],
+                    "query_type": question_data.get("query_type", "unknown"),
+                    "difficulty": question_data.get("difficulty", "medium"),
+                    "generated_by": "ai",
+                    "is_validated": False
+                })
                 
             except Exception as e:
                 logger.error(f"Failed to save question: {e}")
                 continue
         
+        # One multi-row INSERT instead of a flush per object
+        if values:
+            await db.execute(insert(ModelTrainingQuestion), values)
+        
         await db.commit()
-        return saved_count
+        return len(values)
 
     async def generate_sql_from_questions(
         self,
@@ -2658,15 +2674,10 @@ Generate a valid MSSQL query for the above question:
     async def _generate_sql_with_ai(self, context: str) -> str:
         """Generate SQL using OpenAI API"""
         try:
-            client = self._get_openai_client()
-            
-            response = client.chat.completions.create(
+            response = await self._create_chat_completion(
                 model=settings.OPENAI_MODEL,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert SQL developer specializing in Microsoft SQL Server. Generate only the SQL query without any explanations or markdown formatting."
-                    },
+                    _SQL_GENERATION_SYSTEM_MESSAGE,
                     {
                         "role": "user",
                         "content": context
@@ -2693,8 +2704,7 @@ Generate a valid MSSQL query for the above question:
     def _fix_top_spacing(self, sql: str) -> str:
         """Fix TOP spacing issues in generated SQL"""
         if sql:
-            import re
-            sql = re.sub(r'TOP(\d+)', r'TOP \1', sql)
+            sql = _TOP_SPACING_RE.sub(r'TOP \1', sql)
             logger.info(f"Fixed TOP spacing in SQL: {sql}")
         return sql
 
@@ -1,9 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, desc
-from sqlalchemy.orm import joinedload
-from typing import Optional, List, Dict, Any
+from sqlalchemy import select, update, func, and_, desc, case, cast, bindparam, literal, null, union_all
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import joinedload, load_only
+from typing import Optional, List, Dict, Any, Tuple
 from fastapi import HTTPException, status
 import logging
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 
 from app.models.database import User, Connection, Conversation, Message
@@ -14,29 +18,67 @@ from app.models.schemas import (
 
 logger = logging.getLogger(__name__)
 
+# Single-row lookups are built once; only their parameters are bound per call
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
+# Connection name for a conversation row, resolved by a primary key lookup per row
+# instead of joining (and widening rows with) Connection
+_CONVERSATION_CONNECTION_NAME = select(Connection.name).where(
+    Connection.id == Conversation.connection_id
+).correlate(Conversation).scalar_subquery().label('connection_name')
+
 
 class UserService:
     """Service for user management operations"""
     
+    # Dashboard stats and activity are cached per user for this many seconds
+    CACHE_TTL = 30
+    # Entries kept per cache; expired entries are purged and the least recently written evicted
+    CACHE_MAX_ENTRIES = 1024
+    
+    def __init__(self):
+        # user_id -> (expires_at, stats)
+        self._stats_cache: "OrderedDict[str, Tuple[float, UserStatsResponse]]" = OrderedDict()
+        # (user_id, days, limit) -> (expires_at, activity)
+        self._activity_cache: "OrderedDict[Tuple[str, int, int], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+    
+    def invalidate_user_cache(self, user_id) -> None:
+        """Drop cached stats and activity for a user after their data changes"""
+        user_key = str(user_id)
+        self._stats_cache.pop(user_key, None)
+        for cache_key in [key for key in self._activity_cache if key[0] == user_key]:
+            del self._activity_cache[cache_key]
+    
+    def _cache_put(self, cache: OrderedDict, key, value) -> None:
+        """Store a value for CACHE_TTL seconds, keeping the cache within CACHE_MAX_ENTRIES"""
+        now = time.monotonic()
+        # Entries are written with the same TTL, so the expired ones are the oldest
+        while cache and next(iter(cache.values()))[0] <= now:
+            cache.popitem(last=False)
+        cache[key] = (now + self.CACHE_TTL, value)
+        cache.move_to_end(key)
+        while len(cache) > self.CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+    
     async def get_user_by_id(self, user_id: str, db: AsyncSession) -> Optional[User]:
         """Get user by ID"""
-        result = await db.execute(
-            select(User).where(User.id == user_id)
-        )
-        return result.scalar_one_or_none()
+        try:
+            user_uuid = uuid.UUID(str(user_id))
+        except ValueError:
+            return None
+        
+        # Served from the session's identity map when the user is already loaded
+        return await db.get(User, user_uuid)
     
     async def get_user_by_email(self, email: str, db: AsyncSession) -> Optional[User]:
         """Get user by email"""
-        result = await db.execute(
-            select(User).where(User.email == email)
-        )
+        result = await db.execute(_USER_BY_EMAIL, {"email": email})
         return result.scalar_one_or_none()
     
     async def get_user_by_username(self, username: str, db: AsyncSession) -> Optional[User]:
         """Get user by username"""
-        result = await db.execute(
-            select(User).where(User.username == username)
-        )
+        result = await db.execute(_USER_BY_USERNAME, {"username": username})
         return result.scalar_one_or_none()
     
     async def update_user_profile(
@@ -47,16 +89,19 @@ class UserService:
     ) -> User:
         """Update user profile"""
         
-        # Update only provided fields
+        # Update only provided fields; RETURNING refreshes the user in the same round trip
         update_dict = update_data.dict(exclude_unset=True)
         
-        for field, value in update_dict.items():
-            setattr(user, field, value)
-        
-        user.updated_at = datetime.now(timezone.utc)
+        result = await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(**update_dict, updated_at=datetime.now(timezone.utc))
+            .returning(User)
+            .execution_options(synchronize_session='fetch')
+        )
+        user = result.scalar_one()
         
         await db.commit()
-        await db.refresh(user)
         
         logger.info(f"Profile updated for user: {user.email}")
         return user
@@ -116,65 +161,54 @@ class UserService:
     async def get_user_stats(self, user: User, db: AsyncSession) -> UserStatsResponse:
         """Get user statistics"""
         
-        # Get connection count
-        connection_count = await db.execute(
-            select(func.count(Connection.id)).where(Connection.user_id == user.id)
-        )
-        total_connections = connection_count.scalar() or 0
-        
-        # Get conversation count
-        conversation_count = await db.execute(
-            select(func.count(Conversation.id)).where(Conversation.user_id == user.id)
-        )
-        total_conversations = conversation_count.scalar() or 0
-        
-        # Get active conversation count
-        active_conversation_count = await db.execute(
-            select(func.count(Conversation.id)).where(
-                and_(
-                    Conversation.user_id == user.id,
-                    Conversation.is_active == True
-                )
-            )
-        )
-        active_conversations = active_conversation_count.scalar() or 0
-        
-        # Get message count
-        message_count = await db.execute(
-            select(func.count(Message.id)).join(Conversation).where(
-                Conversation.user_id == user.id
+        user_key = str(user.id)
+        cached = self._stats_cache.get(user_key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        # Connection count
+        connection_count = select(func.count(Connection.id)).where(
+            Connection.user_id == user.id
+        ).scalar_subquery()
+        
+        # Conversation counts (all and active)
+        conversation_stats = select(
+            func.count(Conversation.id).label('total_conversations'),
+            func.count(case((Conversation.is_active == True, Conversation.id))).label('active_conversations')
+        ).where(Conversation.user_id == user.id).subquery()
+        
+        # Message counts, query count (assistant messages) and last activity (most recent message)
+        message_stats = select(
+            func.count(Message.id).label('total_messages'),
+            func.count(case((Message.message_type == 'assistant', Message.id))).label('total_queries'),
+            func.max(Message.created_at).label('last_activity')
+        ).join(Conversation).where(Conversation.user_id == user.id).subquery()
+        
+        # Each part aggregates to a single row, so this is one round trip returning one row
+        result = await db.execute(
+            select(
+                connection_count.label('total_connections'),
+                conversation_stats.c.total_conversations,
+                conversation_stats.c.active_conversations,
+                message_stats.c.total_messages,
+                message_stats.c.total_queries,
+                message_stats.c.last_activity
             )
         )
-        total_messages = message_count.scalar() or 0
-        
-        # Get query count (assistant messages)
-        query_count = await db.execute(
-            select(func.count(Message.id)).join(Conversation).where(
-                and_(
-                    Conversation.user_id == user.id,
-                    Message.message_type == 'assistant'
-                )
-            )
+        stats = result.one()
+        
+        user_stats = UserStatsResponse(
+            user_id=user_key,
+            total_connections=stats.total_connections or 0,
+            total_conversations=stats.total_conversations or 0,
+            total_messages=stats.total_messages or 0,
+            total_queries=stats.total_queries or 0,
+            active_conversations=stats.active_conversations or 0,
+            last_activity=stats.last_activity
         )
-        total_queries = query_count.scalar() or 0
         
-        # Get last activity (most recent message)
-        last_activity_result = await db.execute(
-            select(func.max(Message.created_at)).join(Conversation).where(
-                Conversation.user_id == user.id
-            )
-        )
-        last_activity = last_activity_result.scalar()
-        
-        return UserStatsResponse(
-            user_id=str(user.id),
-            total_connections=total_connections,
-            total_conversations=total_conversations,
-            total_messages=total_messages,
-            total_queries=total_queries,
-            active_conversations=active_conversations,
-            last_activity=last_activity
-        )
+        self._cache_put(self._stats_cache, user_key, user_stats)
+        return user_stats
     
     async def get_user_connections(
         self, 
@@ -185,8 +219,18 @@ class UserService:
     ) -> List[ConnectionResponse]:
         """Get user's connections"""
         
+        # Load only the columns ConnectionResponse reads; skips credentials and large
+        # JSONB payloads such as sample_data. No relationships are touched below.
         result = await db.execute(
-            select(Connection).where(
+            select(Connection).options(
+                load_only(
+                    Connection.id, Connection.name, Connection.server, Connection.database_name,
+                    Connection.driver, Connection.encrypt, Connection.trust_server_certificate,
+                    Connection.status, Connection.test_successful, Connection.database_schema,
+                    Connection.last_schema_refresh, Connection.total_queries, Connection.last_queried_at,
+                    Connection.created_at, Connection.updated_at
+                )
+            ).where(
                 Connection.user_id == user.id
             ).order_by(desc(Connection.created_at)).limit(limit).offset(offset)
         )
@@ -225,7 +269,7 @@ class UserService:
     ) -> List[ConversationResponse]:
         """Get user's conversations"""
         
-        query = select(Conversation, Connection.name.label('connection_name')).join(Connection).where(
+        query = select(Conversation, _CONVERSATION_CONNECTION_NAME).where(
             Conversation.user_id == user.id
         )
         
@@ -242,19 +286,6 @@ class UserService:
         
         conversations = []
         for conv, connection_name in conversation_data:
-            # Get latest message preview
-            latest_message_result = await db.execute(
-                select(Message.content).where(
-                    Message.conversation_id == conv.id
-                ).order_by(desc(Message.created_at)).limit(1)
-            )
-            latest_message = latest_message_result.scalar()
-            
-            # Truncate latest message for preview
-            latest_message_preview = None
-            if latest_message:
-                latest_message_preview = latest_message[:100] + "..." if len(latest_message) > 100 else latest_message
-            
             conversations.append(
                 ConversationResponse(
                     id=str(conv.id),
@@ -269,7 +300,7 @@ class UserService:
                     created_at=conv.created_at,
                     updated_at=conv.updated_at,
                     last_message_at=conv.last_message_at,
-                    latest_message=latest_message_preview
+                    latest_message=conv.latest_message_preview
                 )
             )
         
@@ -283,15 +314,19 @@ class UserService:
     ) -> User:
         """Update user preferences"""
         
-        # Merge with existing preferences
-        current_prefs = user.preferences or {}
-        current_prefs.update(preferences)
+        # Merge with existing preferences in the database (jsonb ||), avoiding a read-modify-write
+        merged_prefs = func.coalesce(User.preferences, cast({}, JSONB)).op('||')(cast(preferences, JSONB))
         
-        user.preferences = current_prefs
-        user.updated_at = datetime.now(timezone.utc)
+        result = await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(preferences=merged_prefs, updated_at=datetime.now(timezone.utc))
+            .returning(User)
+            .execution_options(synchronize_session='fetch')
+        )
+        user = result.scalar_one()
         
         await db.commit()
-        await db.refresh(user)
         
         return user
     
@@ -304,52 +339,74 @@ class UserService:
     ) -> List[Dict[str, Any]]:
         """Get user's recent activity"""
         
+        user_key = str(user.id)
+        cached = self._activity_cache.get((user_key, days, limit))
+        if cached and cached[0] > time.monotonic():
+            return list(cached[1])
+        
         since_date = datetime.now(timezone.utc) - timedelta(days=days)
         
-        # Get recent conversations
-        recent_conversations = await db.execute(
-            select(Conversation, Connection.name.label('connection_name')).join(Connection).where(
-                and_(
-                    Conversation.user_id == user.id,
-                    Conversation.last_message_at >= since_date
-                )
-            ).order_by(desc(Conversation.last_message_at)).limit(limit)
+        # Conversations and connections are merged, ordered and limited in one UNION ALL;
+        # columns that only apply to one kind of activity are NULL for the other
+        recent_conversations = select(
+            literal('conversation').label('type'),
+            Conversation.id.label('id'),
+            Conversation.title.label('title'),
+            _CONVERSATION_CONNECTION_NAME,
+            null().label('name'),
+            Conversation.message_count.label('message_count'),
+            null().label('status'),
+            Conversation.last_message_at.label('timestamp')
+        ).where(
+            and_(
+                Conversation.user_id == user.id,
+                Conversation.last_message_at >= since_date
+            )
         )
         
-        activity = []
-        for conv, connection_name in recent_conversations.all():
-            activity.append({
-                "type": "conversation",
-                "id": str(conv.id),
-                "title": conv.title,
-                "connection_name": connection_name,
-                "timestamp": conv.last_message_at,
-                "message_count": conv.message_count
-            })
-        
-        # Get recent connections
-        recent_connections = await db.execute(
-            select(Connection).where(
-                and_(
-                    Connection.user_id == user.id,
-                    Connection.created_at >= since_date
-                )
-            ).order_by(desc(Connection.created_at)).limit(limit)
+        recent_connections = select(
+            literal('connection').label('type'),
+            Connection.id.label('id'),
+            null().label('title'),
+            null().label('connection_name'),
+            Connection.name.label('name'),
+            null().label('message_count'),
+            Connection.status.label('status'),
+            Connection.created_at.label('timestamp')
+        ).where(
+            and_(
+                Connection.user_id == user.id,
+                Connection.created_at >= since_date
+            )
         )
         
-        for conn in recent_connections.scalars():
-            activity.append({
-                "type": "connection",
-                "id": str(conn.id),
-                "name": conn.name,
-                "timestamp": conn.created_at,
-                "status": conn.status
-            })
-        
-        # Sort by timestamp
-        activity.sort(key=lambda x: x["timestamp"], reverse=True)
+        activity_union = union_all(recent_conversations, recent_connections)
+        result = await db.execute(
+            activity_union.order_by(desc(activity_union.selected_columns.timestamp)).limit(limit)
+        )
         
-        return activity[:limit]
+        activity = []
+        for row in result.all():
+            if row.type == "conversation":
+                activity.append({
+                    "type": "conversation",
+                    "id": str(row.id),
+                    "title": row.title,
+                    "connection_name": row.connection_name,
+                    "timestamp": row.timestamp,
+                    "message_count": row.message_count
+                })
+            else:
+                activity.append({
+                    "type": "connection",
+                    "id": str(row.id),
+                    "name": row.name,
+                    "timestamp": row.timestamp,
+                    "status": row.status
+                })
+        
+        self._cache_put(self._activity_cache, (user_key, days, limit), activity)
+        return list(activity)
 
 
 # Create user service instance
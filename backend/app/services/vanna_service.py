@@ -1,29 +1,50 @@
 import os
 import json
-import shutil
 from typing import Optional, Dict, Any, List, Callable
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 import time
 import stat
-import gc
+import asyncio
+import itertools
+import contextlib
+from collections import OrderedDict
 
-from app.models.vanna_models import VannaConfig, DatabaseConfig, VannaTrainingData, TrainingDocumentation, TrainingExample
+from app.models.vanna_models import VannaConfig, DatabaseConfig
 from app.models.database import Model, ModelStatus, Connection
 from sqlalchemy import select
 from app.config import settings
+from app.core.database import AsyncSessionLocal
 from app.core.vanna_wrapper import MyVanna
 from app.models.database import User
+from app.services.connection_service import connection_service
+from app.utils.file_handler import file_handler
 
 logger = logging.getLogger(__name__)
 
 
 class VannaService:
-    """Stateless service for managing Vanna AI instances - no persistent connections"""
+    """Service for managing Vanna AI instances"""
+    
+    # Query-ready instances are reused per (model, connection) pair
+    VANNA_INSTANCE_CACHE_SIZE = 32
+    VANNA_INSTANCE_CACHE_TTL = 600  # seconds before a cached instance is refreshed
+    VANNA_INSTANCE_STALE_TTL = 1800  # seconds a stale instance may be served while it refreshes
     
     def __init__(self):
         self.data_dir = settings.DATA_DIR
-        # NO instance caching - everything is stateless
+        # (model_id, connection_id) -> (MyVanna, created_at), least recently used first
+        self._vanna_instances: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._vanna_instances_lock = asyncio.Lock()
+        self._vanna_refreshes: Dict[tuple, asyncio.Task] = {}
+        # In-flight instance builds, so concurrent misses on one key share a single build
+        # without holding the cache lock while it runs
+        self._vanna_instance_builds: Dict[tuple, asyncio.Task] = {}
+        # Model id -> path of its trained ChromaDB store; loaded from disk once, then kept
+        # current by training and cleanup instead of stat-ing the store per request
+        self._trained_store_paths: Optional[Dict[str, str]] = None
+        # Model id -> (lock serializing training runs for that model, runs holding or awaiting it)
+        self._training_locks: Dict[str, tuple] = {}
     
     def _get_chromadb_path(self, model_id: str) -> str:
         """Get the ChromaDB path for a model - use configurable base path for flexibility"""
@@ -32,29 +53,50 @@ class VannaService:
     
     def _get_latest_chromadb_path(self, model_id: str) -> str:
         """Get the ChromaDB path for querying - use configurable base path"""
-        chromadb_path = os.path.join(settings.CHROMADB_BASE_PATH, "chroma_db", "models", model_id)
-        if os.path.exists(chromadb_path):
-            return chromadb_path
-        return None
+        if self._trained_store_paths is None:
+            self.load_trained_store_paths()
+        return self._trained_store_paths.get(model_id)
+    
+    def get_trained_store_path(self, model_id: str) -> Optional[str]:
+        """Get the path of a model's trained ChromaDB store, or None if it has not been trained"""
+        return self._get_latest_chromadb_path(model_id)
+    
+    def load_trained_store_paths(self) -> None:
+        """Scan the models directory for existing ChromaDB stores (blocking)"""
+        models_dir = os.path.join(settings.CHROMADB_BASE_PATH, "chroma_db", "models")
+        trained_store_paths = {}
+        try:
+            # DirEntry.is_dir() is answered from the directory listing, without a stat per entry
+            with os.scandir(models_dir) as entries:
+                trained_store_paths = {
+                    entry.name: entry.path for entry in entries
+                    if entry.is_dir() and file_handler.TRASH_MARKER not in entry.name
+                }
+        except FileNotFoundError:
+            pass
+        self._trained_store_paths = trained_store_paths
+        logger.info(f"Found {len(trained_store_paths)} trained model stores in {models_dir}")
     
     def _verify_clean_state(self, model_id: str) -> bool:
         """Verify that ChromaDB is completely clean"""
         model_dir = os.path.join(settings.CHROMADB_BASE_PATH, "chroma_db", "models", model_id)
         
-        if not os.path.exists(model_dir):
-            return True
-            
-        # Check for the single chromadb_store directory
-        chromadb_path = os.path.join(model_dir)
-        if os.path.exists(chromadb_path):
-            logger.warning(f"Found existing ChromaDB directory: {chromadb_path}")
+        # Stop at the first store file instead of listing the whole directory
+        try:
+            with os.scandir(model_dir) as entries:
+                first_entry = next(entries, None)
+        except FileNotFoundError:
+            first_entry = None
+        
+        if first_entry is not None:
+            logger.warning(f"Found existing ChromaDB data in: {model_dir}")
             return False
             
         logger.info(f"Verified clean state for model {model_id}")
         return True
     
-    def _ensure_directory_writable(self, path: str) -> None:
-        """Ensure directory exists and is writable with full permissions"""
+    async def _ensure_directory_writable(self, path: str) -> None:
+        """Recreate the directory empty; ChromaDB fails loudly if it cannot write"""
         try:
             # Create parent directory if it doesn't exist
             parent_dir = os.path.dirname(path)
@@ -65,53 +107,186 @@ class VannaService:
             # Remove directory if it exists to start completely fresh
             if os.path.exists(path):
                 logger.info(f"🔥 Removing existing directory for fresh start: {path}")
+                self._forget_stores_under(path)
                 try:
-                    shutil.rmtree(path)
+                    await file_handler.discard_directory_async(path)
                 except PermissionError:
-                    # If we can't delete, try to remove contents instead
+                    # If we can't delete, try to remove contents instead. Old segment subdirectories
+                    # are deleted together in the background; the new store never reuses their names
                     logger.warning(f"Could not delete directory {path}, removing contents instead")
-                    for item in os.listdir(path):
-                        item_path = os.path.join(path, item)
-                        try:
-                            if os.path.isfile(item_path):
-                                os.unlink(item_path)
-                            elif os.path.isdir(item_path):
-                                shutil.rmtree(item_path)
-                        except PermissionError:
-                            logger.warning(f"Could not remove {item_path}, continuing...")
-            
-            # Create new directory with full permissions
+                    subdirectories = []
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirectories.append(entry.path)
+                                else:
+                                    os.unlink(entry.path)
+                            except PermissionError:
+                                logger.warning(f"Could not remove {entry.path}, continuing...")
+                    file_handler.remove_tree_in_background(*subdirectories)
+            
+            # Create the new directory with the process umask applied, like every store subdirectory
             os.makedirs(path, exist_ok=True)
-            
-            # Try to set permissions, but don't fail if we can't
-            try:
-                os.chmod(path, 0o777)  # Full permissions for all
-            except PermissionError:
-                logger.warning(f"Could not set permissions on {path}, continuing...")
-            
-            # Test write permissions
-            test_file = os.path.join(path, ".write_test")
-            try:
-                with open(test_file, 'w') as f:
-                    f.write("test")
-                os.remove(test_file)
-                logger.info(f"🔥 Directory confirmed writable: {path}")
-            except Exception as write_error:
-                logger.error(f"Directory not writable: {path}, error: {write_error}")
-                raise
                 
         except Exception as e:
             logger.error(f"Directory not writable: {path}, error: {e}")
             raise
             raise
     
+    def _create_query_vanna_instance(self, chromadb_path: str, connection: Optional[Connection] = None) -> MyVanna:
+        """Create a Vanna instance over a trained ChromaDB store, connected to the model's database"""
+        vanna_config_dict = {
+            "api_key": settings.OPENAI_API_KEY,
+            "base_url": settings.OPENAI_BASE_URL,
+            "model": settings.OPENAI_MODEL,
+            "embedding_model": settings.OPENAI_EMBEDDING_MODEL,
+            "path": chromadb_path
+        }
+        vanna_instance = MyVanna(config=vanna_config_dict)
+        
+        if connection:
+            db_config = DatabaseConfig(
+                server=connection.server,
+                database_name=connection.database_name,
+                username=connection.username,
+                password=connection.password,
+                driver=connection.driver or 'ODBC Driver 17 for SQL Server',
+                encrypt=connection.encrypt,
+                trust_server_certificate=connection.trust_server_certificate
+            )
+            vanna_instance.connect_to_database(db_config)
+        
+        return vanna_instance
+    
+    def get_cached_vanna_instance(self, model_id: str, connection_id: Optional[str]) -> Optional[MyVanna]:
+        """Return the cached instance for a model and connection id while it is fresh, else None"""
+        # No await between lookup and reorder, so this is safe without the cache lock and
+        # lets callers skip loading the Connection row when the instance is already cached
+        cache_key = (model_id, connection_id)
+        cached = self._vanna_instances.get(cache_key)
+        if cached and time.monotonic() - cached[1] < self.VANNA_INSTANCE_CACHE_TTL:
+            self._vanna_instances.move_to_end(cache_key)
+            return cached[0]
+        return None
+    
+    async def get_vanna_instance(self, model_id: str, connection: Optional[Connection] = None) -> Optional[MyVanna]:
+        """Get a query-ready Vanna instance for a trained model, reusing a cached one while fresh"""
+        cache_key = (model_id, str(connection.id) if connection else None)
+        async with self._vanna_instances_lock:
+            # A cached instance proves the trained store exists; every path that removes
+            # the store invalidates it, so the filesystem is only checked on a miss
+            cached = self._vanna_instances.get(cache_key)
+            if cached:
+                age = time.monotonic() - cached[1]
+                if age < self.VANNA_INSTANCE_CACHE_TTL:
+                    self._vanna_instances.move_to_end(cache_key)
+                    return cached[0]
+                if age < self.VANNA_INSTANCE_STALE_TTL:
+                    # Serve the last known good instance while a replacement is built, so a
+                    # slow or failing rebuild never fails the request
+                    self._vanna_instances.move_to_end(cache_key)
+                    if cache_key not in self._vanna_refreshes:
+                        task = asyncio.create_task(self._refresh_vanna_instance(cache_key, cached, model_id, connection))
+                        self._vanna_refreshes[cache_key] = task
+                        task.add_done_callback(lambda _, key=cache_key: self._vanna_refreshes.pop(key, None))
+                    return cached[0]
+            
+            build = self._vanna_instance_builds.get(cache_key)
+            if build is None:
+                chromadb_path = self._get_latest_chromadb_path(model_id)
+                if not chromadb_path:
+                    return None
+                build = asyncio.create_task(self._build_vanna_instance(cache_key, model_id, chromadb_path, connection))
+                self._vanna_instance_builds[cache_key] = build
+                build.add_done_callback(
+                    lambda done, key=cache_key: self._vanna_instance_builds.get(key) is done
+                    and self._vanna_instance_builds.pop(key)
+                )
+        
+        # Shielded so a cancelled request does not cancel a build other requests are awaiting
+        return await asyncio.shield(build)
+    
+    async def _build_vanna_instance(
+        self, cache_key: tuple, model_id: str, chromadb_path: str, connection: Optional[Connection]
+    ) -> MyVanna:
+        """Create an instance off the event loop and cache it unless it was invalidated meanwhile"""
+        vanna_instance = await asyncio.to_thread(self._create_query_vanna_instance, chromadb_path, connection)
+        async with self._vanna_instances_lock:
+            # Invalidation drops the in-flight build, so its now outdated instance is not cached
+            if self._vanna_instance_builds.get(cache_key) is asyncio.current_task():
+                self._store_vanna_instance(cache_key, vanna_instance)
+                logger.info(f"Vanna instance created and cached for model {model_id}")
+        return vanna_instance
+    
+    def _store_vanna_instance(self, cache_key: tuple, vanna_instance: MyVanna) -> None:
+        """Cache an instance as most recently used, evicting the least recently used"""
+        self._vanna_instances[cache_key] = (vanna_instance, time.monotonic())
+        self._vanna_instances.move_to_end(cache_key)
+        while len(self._vanna_instances) > self.VANNA_INSTANCE_CACHE_SIZE:
+            self._vanna_instances.popitem(last=False)
+    
+    async def _refresh_vanna_instance(
+        self, cache_key: tuple, stale_entry: tuple, model_id: str, connection: Optional[Connection]
+    ) -> None:
+        """Rebuild a stale cached instance in the background"""
+        try:
+            chromadb_path = self._get_latest_chromadb_path(model_id)
+            if not chromadb_path:
+                return
+            vanna_instance = await asyncio.to_thread(self._create_query_vanna_instance, chromadb_path, connection)
+        except Exception as e:
+            # The stale instance keeps being served until it passes VANNA_INSTANCE_STALE_TTL
+            logger.warning(f"Failed to refresh Vanna instance for model {model_id}, serving cached instance: {e}")
+            return
+        
+        async with self._vanna_instances_lock:
+            # Skip the store if the entry was invalidated (model retrained or cleaned up,
+            # connection changed) or replaced meanwhile
+            if self._vanna_instances.get(cache_key) is stale_entry:
+                self._store_vanna_instance(cache_key, vanna_instance)
+                logger.info(f"Vanna instance refreshed for model {model_id}")
+    
+    def invalidate_vanna_instances(self, model_id: str) -> None:
+        """Drop cached Vanna instances for a model after its training data changes"""
+        self._drop_vanna_instances(lambda key: key[0] == model_id)
+    
+    def invalidate_connection_vanna_instances(self, connection_id: str) -> None:
+        """Drop cached Vanna instances bound to a connection after it is updated or deleted"""
+        self._drop_vanna_instances(lambda key: key[1] == connection_id)
+    
+    def _drop_vanna_instances(self, matches) -> None:
+        """Forget cached instances and in-flight builds whose cache key matches"""
+        for cache_key in [key for key in self._vanna_instances if matches(key)]:
+            del self._vanna_instances[cache_key]
+        for cache_key in [key for key in self._vanna_instance_builds if matches(key)]:
+            del self._vanna_instance_builds[cache_key]
+    
+    def sweep_chromadb_trash(self) -> None:
+        """Remove ChromaDB directories discarded before the last shutdown, in the background"""
+        chroma_dir = os.path.join(settings.CHROMADB_BASE_PATH, "chroma_db")
+        file_handler.sweep_discarded_directories(chroma_dir)
+        file_handler.sweep_discarded_directories(os.path.join(chroma_dir, "models"))
+    
+    def _forget_stores_under(self, path: str) -> None:
+        """Stop treating stores inside a directory that is about to be removed as trained"""
+        # Build the "<path>/" prefix once rather than re-joining it for every indexed store
+        path_prefix = os.path.join(path, "")
+        for model_id, store_path in list((self._trained_store_paths or {}).items()):
+            if store_path == path or store_path.startswith(path_prefix):
+                del self._trained_store_paths[model_id]
+                self.invalidate_vanna_instances(model_id)
+    
     def _force_cleanup_chromadb(self, model_id: str) -> None:
         """Force cleanup of ChromaDB directories"""
+        self.invalidate_vanna_instances(model_id)
+        if self._trained_store_paths is not None:
+            self._trained_store_paths.pop(model_id, None)
         try:
             model_dir = os.path.join(settings.CHROMADB_BASE_PATH, "chroma_db", "models", model_id)
             if os.path.exists(model_dir):
                 logger.info(f"🔥 Force cleaning ChromaDB directory: {model_dir}")
-                shutil.rmtree(model_dir)
+                file_handler.discard_directory(model_dir)
                 logger.info(f"🔥 ChromaDB directory cleaned: {model_dir}")
         except Exception as e:
             logger.error(f"Failed to force clean ChromaDB directory {model_dir}: {e}")
@@ -135,56 +310,80 @@ class VannaService:
             if progress_callback:
                 await progress_callback(10, "Initializing Vanna instance...")
             
-            # Get ChromaDB path for this model
-            chromadb_path = self._get_chromadb_path(model_id)
-            
-            # Ensure clean state if retraining
-            if retrain:
-                logger.info(f"Retraining requested for model {model_id} - cleaning up existing data")
+            # Only one training run per model at a time: they share the model's single store
+            # path, so a second run would discard the store the first is still writing
+            async with self._model_training_lock(model_id):
+                # Get ChromaDB path for this model
+                chromadb_path = self._get_chromadb_path(model_id)
+                
+                # Start from a fresh, writable store for this model only. This replaces the old
+                # separate retrain cleanup plus a wipe of the parent directory, which discarded
+                # every other model's store as well.
+                if retrain:
+                    logger.info(f"Retraining requested for model {model_id} - cleaning up existing data")
+                    if progress_callback:
+                        await progress_callback(15, "Cleaning up existing training data...")
+                await self._ensure_directory_writable(chromadb_path)
+                
                 if progress_callback:
-                    await progress_callback(15, "Cleaning up existing training data...")
-                self._force_cleanup_chromadb(model_id)
-            
-            # Ensure directory is writable
-            self._ensure_directory_writable(os.path.dirname(chromadb_path))
-            
-            if progress_callback:
-                await progress_callback(20, "Connecting to database...")
-            
-            # Create Vanna instance with ChromaDB path in config
-            logger.info(f"ChromaDB path being set: {chromadb_path}")
-            vanna_config_dict = vanna_config.dict() if hasattr(vanna_config, 'dict') else {
-                "api_key": vanna_config.api_key,
-                "base_url": vanna_config.base_url,
-                "model": vanna_config.model,
-                "path": chromadb_path
-            }
-            # Always add the path to the config dict
-            vanna_config_dict["path"] = chromadb_path
-            logger.info(f"Vanna config dict: {vanna_config_dict}")
-            
-            vanna_instance = MyVanna(config=vanna_config_dict)
-            
-            # Connect to database
-            vanna_instance.connect_to_database(db_config)
-            
-            logger.info(f"Vanna connected to database for model {model_id}{user_info}")
-            
-            if progress_callback:
-                await progress_callback(30, "Training model with data...")
-            
-            # Train the model
-            await self._train_vanna_instance(vanna_instance, model_id, progress_callback, user, db)
-            
-            logger.info(f"Vanna setup completed successfully for model {model_id}{user_info}")
-            
-            return vanna_instance
+                    await progress_callback(20, "Connecting to database...")
+                
+                # Create Vanna instance with ChromaDB path in config
+                logger.info(f"ChromaDB path being set: {chromadb_path}")
+                vanna_config_dict = vanna_config.dict() if hasattr(vanna_config, 'dict') else {
+                    "api_key": vanna_config.api_key,
+                    "base_url": vanna_config.base_url,
+                    "model": vanna_config.model,
+                    "path": chromadb_path
+                }
+                # Always add the path to the config dict
+                vanna_config_dict["path"] = chromadb_path
+                logger.info(f"Vanna config dict: {vanna_config_dict}")
+                
+                # Opening ChromaDB and connecting to the database block, so both run in a worker thread
+                vanna_instance = await asyncio.to_thread(MyVanna, config=vanna_config_dict)
+                
+                # Connect to database
+                await asyncio.to_thread(vanna_instance.connect_to_database, db_config)
+                
+                logger.info(f"Vanna connected to database for model {model_id}{user_info}")
+                
+                if progress_callback:
+                    await progress_callback(30, "Training model with data...")
+                
+                # Train the model
+                await self._train_vanna_instance(vanna_instance, model_id, progress_callback, user, db)
+                self.invalidate_vanna_instances(model_id)
+                if self._trained_store_paths is not None:
+                    self._trained_store_paths[model_id] = chromadb_path
+                
+                logger.info(f"Vanna setup completed successfully for model {model_id}{user_info}")
+                
+                return vanna_instance
             
         except Exception as e:
             error_msg = f"Failed to setup Vanna for model {model_id}{user_info}: {e}"
             logger.error(error_msg)
             raise
     
+    @contextlib.asynccontextmanager
+    async def _model_training_lock(self, model_id: str):
+        """Hold a model's training lock, dropping it once no run holds or awaits it"""
+        # Counted instead of checking lock.locked(): a released lock reads as unlocked
+        # before the waiter it woke has reacquired it
+        lock, users = self._training_locks.get(model_id, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._training_locks[model_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._training_locks[model_id]
+            if users == 1:
+                del self._training_locks[model_id]
+            else:
+                self._training_locks[model_id] = (lock, users - 1)
+    
     async def _train_vanna_instance(
         self,
         vanna_instance: MyVanna,
@@ -200,21 +399,25 @@ class VannaService:
             if progress_callback:
                 await progress_callback(40, "Loading training data...")
             
-            # Clear old training data from ChromaDB to ensure fresh training
-            try:
-                vanna_instance.clear_training_data()
-                logger.info("Cleared old training data from ChromaDB")
-            except Exception as e:
-                logger.error(f"Failed to clear training data: {e}")
-                # Continue with training even if clearing fails
+            # No clear_training_data() here: setup_and_train_vanna has just recreated the store
+            # empty, and clearing would discard it and reinitialize ChromaDB a second time
             
-            # Get training data for this model
+            # Get training data for this model. training_service imports this module at load
+            # time, so it cannot be imported at the top; after the first call this is a
+            # sys.modules lookup
             from app.services.training_service import training_service
             
             if db:
-                documentation = await training_service.get_model_training_documentation(db, model_id)
-                questions = await training_service.get_model_training_questions(db, model_id)
-                columns = await training_service.get_model_training_columns(db, model_id)
+                # An AsyncSession cannot run statements concurrently, so the other two reads get their own pooled sessions
+                async def fetch_in_own_session(fetch):
+                    async with AsyncSessionLocal() as session:
+                        return await fetch(session, model_id)
+                
+                documentation, questions, columns = await asyncio.gather(
+                    training_service.get_model_training_documentation(db, model_id),
+                    fetch_in_own_session(training_service.get_model_training_questions),
+                    fetch_in_own_session(training_service.get_model_training_columns)
+                )
             else:
                 # Fallback to empty data if no DB session
                 documentation = []
@@ -224,47 +427,12 @@ class VannaService:
             if progress_callback:
                 await progress_callback(50, f"Training with {len(questions)} examples...")
             
-            # print the columns
-            
-            # Convert to Vanna training data format
-            column_descriptions = []
-            for col in columns:
-                description_text = col.description or ""
-                if col.value_range:
-                    description_text += " " + col.value_range
-                column_descriptions.append({
-                    "table_name": col.table_name,
-                    "column_name": col.column_name,
-                    "data_type": col.data_type,
-                    "description": description_text
-                })
-            training_data = VannaTrainingData(
-                documentation=[
-                    TrainingDocumentation(
-                        doc_type=doc.doc_type,
-                        content=doc.content
-                    ) for doc in documentation
-                ],
-                examples=[
-                    TrainingExample(
-                        question=q.question,
-                        sql=q.sql
-                    ) for q in questions
-                ],
-                column_descriptions=[
-                    {
-                        "table_name": col_desc["table_name"],
-                        "column_name": col_desc["column_name"],
-                        "data_type": col_desc["data_type"],
-                        "description": col_desc["description"]
-                    } for col_desc in column_descriptions
-                ]
+            logger.debug(
+                f"Loaded {len(documentation)} documentation entries, {len(questions)} examples "
+                f"and {len(columns)} columns for model {model_id}"
             )
-
-            # print the training data
-            logger.info(f"q {training_data}")
             
-            if not training_data.examples and not training_data.documentation:
+            if not questions and not documentation:
                 logger.warning(f"No training data found for model {model_id}{user_info}")
                 if progress_callback:
                     await progress_callback(100, "No training data available")
@@ -274,46 +442,56 @@ class VannaService:
             if progress_callback:
                 await progress_callback(60, "Training Vanna model...")
             
-            # Train with documentation
-            for doc in training_data.documentation:
-                try:
-                    vanna_instance.train(documentation=doc.content)
-                    logger.info(f"Trained documentation: {doc.doc_type}")
-                except Exception as e:
-                    logger.error(f"Failed to train documentation {doc.doc_type}: {e}")
+            # Documentation, column descriptions and table-level entries (to make table
+            # names more prominent) all go to the documentation collection in batches.
+            # Entries are generated straight from the fetched rows into one list each.
+            def column_entries():
+                for col in columns:
+                    description_text = col.description or ""
+                    if col.value_range:
+                        description_text += " " + col.value_range
+                    yield f"Table '{col.table_name}' has column '{col.column_name}' ({col.data_type}): {description_text}"
+            
+            table_names = list(dict.fromkeys(col.table_name for col in columns))
+            
+            # Identical entries would get identical ids; keep the first of each
+            documentation_contents = list(dict.fromkeys(itertools.chain(
+                (doc.content for doc in documentation if doc.content),
+                column_entries(),
+                (f"Table '{table_name}' contains player statistics and performance data." for table_name in table_names)
+            )))
+            examples = [
+                {"question": question, "sql": sql}
+                for question, sql in dict.fromkeys((q.question, q.sql) for q in questions)
+            ]
             
-            # Train with examples (question-SQL pairs)
-            for example in training_data.examples:
-                try:
-                    vanna_instance.train(question=example.question, sql=example.sql)
-                    logger.info(f"Trained example: {example.question[:50]}...")
-                except Exception as e:
-                    logger.error(f"Failed to train example: {e}")
+            try:
+                await self._add_training_batches(
+                    vanna_instance.add_documentation_batch, documentation_contents,
+                    progress_callback, 60, 80, "documentation entries"
+                )
+                logger.info(
+                    f"Trained {len(documentation)} documentation entries, "
+                    f"{len(columns)} column descriptions and {len(table_names)} table descriptions"
+                )
+            except Exception as e:
+                logger.error(f"Failed to train documentation: {e}")
             
-            # Train with column descriptions as documentation
-            for col_desc in training_data.column_descriptions:
-                try:
-                    content = f"Table '{col_desc['table_name']}' has column '{col_desc['column_name']}' ({col_desc['data_type']}): {col_desc['description']}"
-                    vanna_instance.train(documentation=content)
-                    logger.info(f"Trained column description: {col_desc['table_name']}.{col_desc['column_name']}")
-                except Exception as e:
-                    logger.error(f"Failed to train column description {col_desc['table_name']}.{col_desc['column_name']}: {e}")
-            
-            # Add table-level training data to make table names more prominent
-            table_names = list(set([col_desc['table_name'] for col_desc in training_data.column_descriptions]))
-            for table_name in table_names:
-                try:
-                    table_content = f"Table '{table_name}' contains player statistics and performance data."
-                    vanna_instance.train(documentation=table_content)
-                    logger.info(f"Trained table description: {table_name}")
-                except Exception as e:
-                    logger.error(f"Failed to train table description {table_name}: {e}")
+            # Train with examples (question-SQL pairs)
+            try:
+                await self._add_training_batches(
+                    vanna_instance.add_question_sql_batch, examples,
+                    progress_callback, 80, 95, "examples"
+                )
+                logger.info(f"Trained {len(questions)} examples")
+            except Exception as e:
+                logger.error(f"Failed to train examples: {e}")
             
             if progress_callback:
                 await progress_callback(95, "Ensuring data persistence...")
             
             # Ensure data is persisted to disk
-            vanna_instance.ensure_persistence()
+            await asyncio.to_thread(vanna_instance.ensure_persistence)
             
             if progress_callback:
                 await progress_callback(100, "Training completed successfully")
@@ -325,6 +503,32 @@ class VannaService:
             logger.error(error_msg)
             raise
     
+    async def _add_training_batches(
+        self,
+        add_batch: Callable[[List[Any]], List[str]],
+        items: List[Any],
+        progress_callback: Optional[Callable[[int, str], None]],
+        progress_start: int,
+        progress_end: int,
+        label: str
+    ) -> None:
+        """Add training items batch by batch, reporting progress between batches"""
+        batch_size = MyVanna.TRAINING_BATCH_SIZE
+        for offset in range(0, len(items), batch_size):
+            # Embedding and ChromaDB writes are blocking, so each batch runs in a worker
+            # thread to keep the event loop (and other requests) responsive during training
+            # Bad entries are skipped inside add_batch; anything else it raises only costs
+            # this batch, not the batches after it
+            try:
+                await asyncio.to_thread(add_batch, items[offset:offset + batch_size])
+            except Exception as e:
+                logger.error(f"Failed to train {label} {offset}-{offset + batch_size}: {e}")
+            
+            if progress_callback:
+                done = min(offset + batch_size, len(items))
+                progress = progress_start + (progress_end - progress_start) * done // len(items)
+                await progress_callback(progress, f"Trained {done}/{len(items)} {label}...")
+    
     async def query_model(
         self,
         model_id: str,
@@ -336,52 +540,25 @@ class VannaService:
         user_info = f" (user: {user.email})" if user else ""
         
         try:
-            # Get latest ChromaDB path
-            chromadb_path = self._get_latest_chromadb_path(model_id)
-            
-            if not chromadb_path:
+            # Get model's connection for database access; the Connection row is only loaded
+            # when no fresh instance is cached for this model and connection
+            connection_id = None
+            if db:
+                result = await db.execute(select(Model.connection_id).where(Model.id == model_id))
+                model_connection_id = result.scalar_one_or_none()
+                if model_connection_id:
+                    connection_id = str(model_connection_id)
+            
+            vanna_instance = self.get_cached_vanna_instance(model_id, connection_id)
+            if vanna_instance is None:
+                connection = await connection_service.get_connection_by_id(db, connection_id) if connection_id else None
+                vanna_instance = await self.get_vanna_instance(model_id, connection)
+            if not vanna_instance:
                 logger.warning(f"No trained model found for model {model_id}{user_info}")
                 return None
             
-            # Create fresh Vanna instance
-            vanna_config_dict = {
-                "api_key": settings.OPENAI_API_KEY,
-                "base_url": settings.OPENAI_BASE_URL,
-                "model": settings.OPENAI_MODEL,
-                "embedding_model": settings.OPENAI_EMBEDDING_MODEL,
-                "path": chromadb_path
-            }
-            
-            vanna_instance = MyVanna(config=vanna_config_dict)
-            
-            logger.info(f"Fresh Vanna instance created for model {model_id}{user_info}")
-            
-            # Get model's connection for database access
-            if db:
-                from app.services.connection_service import connection_service
-                result = await db.execute(select(Model).where(Model.id == model_id))
-                model = result.scalar_one_or_none()
-                if model:
-                    connection = await connection_service.get_connection_by_id(db, str(model.connection_id))
-                    if connection:
-                        # Create database config
-                        from app.models.vanna_models import DatabaseConfig
-                        db_config = DatabaseConfig(
-                            server=connection.server,
-                            database_name=connection.database_name,
-                            username=connection.username,
-                            password=connection.password,
-                            driver=connection.driver or 'ODBC Driver 17 for SQL Server',
-                            encrypt=connection.encrypt,
-                            trust_server_certificate=connection.trust_server_certificate
-                        )
-                        
-                        # Connect to database
-                        vanna_instance.connect_to_database(db_config)
-                        logger.info(f"Connected to database for querying model {model_id}{user_info}")
-            
-            # Execute query
-            result = vanna_instance.generate_sql(question)
+            # Execute query (embedding lookup and LLM call block, so run them in a worker thread)
+            result = await asyncio.to_thread(vanna_instance.generate_sql, question)
             return result
             
         except Exception as e:
@@ -398,11 +575,13 @@ class VannaService:
             
         
             
-            # Remove model directory if empty
+            # Remove model directory if empty; rmdir itself fails cheaply if it is missing or not empty
             model_dir = os.path.join(settings.CHROMADB_BASE_PATH, "chroma_db", "models", model_id)
-            if os.path.exists(model_dir) and not os.listdir(model_dir):
+            try:
                 os.rmdir(model_dir)
                 logger.info(f"Removed empty model directory for {model_id}{user_info}")
+            except OSError:
+                pass
             
             return True
             
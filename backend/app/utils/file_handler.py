@@ -1,6 +1,14 @@
+import asyncio
 import csv
+import errno
 import io
 import os
+import shutil
+import stat
+import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from fastapi import UploadFile, HTTPException
 import logging
@@ -10,12 +18,63 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+
+def _add_owner_permissions(path: str) -> None:
+    """Grant the owner rwx on a directory, leaving group and other bits untouched"""
+    mode = os.lstat(path).st_mode
+    if stat.S_ISDIR(mode):
+        os.chmod(path, mode | stat.S_IRWXU)
+
+
+def _retry_with_write_permission(root: str):
+    """Build a shutil.rmtree error handler for ``root``: it grants the owner access to the entry
+    that failed and retries it, never touches paths outside ``root``, and never raises"""
+    root = os.path.abspath(root)
+    
+    def within_root(path: str) -> bool:
+        path = os.path.abspath(path)
+        return path == root or path.startswith(root + os.sep)
+    
+    def handler(func, path, exc_info):
+        if not issubclass(exc_info[0], PermissionError):
+            return
+        try:
+            if func in (os.unlink, os.rmdir):
+                # Removing an entry needs write permission on its parent directory, which may
+                # only be changed inside the tree (never the root's own parent)
+                parent = os.path.dirname(path)
+                if not within_root(parent):
+                    return
+                _add_owner_permissions(parent)
+                func(path)
+            elif within_root(path):
+                # os.open/os.scandir/os.lstat could not read a directory, so rmtree skipped its
+                # contents; make it readable and remove that subtree on its own. Only recurse once
+                # access is actually granted, so the nested rmtree cannot fail the same way again
+                _add_owner_permissions(path)
+                if os.access(path, os.R_OK | os.W_OK | os.X_OK):
+                    shutil.rmtree(path, onerror=handler)
+        except Exception as e:
+            logger.debug(f"Could not remove {path}: {e}")
+    
+    return handler
+
+
 class FileHandler:
     """Handle file uploads and processing"""
     
+    # Suffix marker for directories moved aside by discard_directory
+    TRASH_MARKER = ".trash-"
+    # Backoff (seconds) before retrying a rename the kernel reported as transiently busy
+    DISCARD_RETRY_DELAYS = (0.1, 0.3)
+    # Paths handed to a single `rm -rf` process, well below any argv length limit
+    RM_BATCH_SIZE = 512
+    
     def __init__(self):
         self.upload_dir = settings.UPLOAD_DIR
         self.max_file_size = settings.MAX_UPLOAD_SIZE
+        # Keep references so pending background deletions are not garbage collected
+        self._background_deletions = set()
     
     async def process_column_descriptions_csv(self, file: UploadFile) -> List[ColumnDescriptionItem]:
         """Process uploaded column descriptions CSV file"""
@@ -24,68 +83,18 @@ class FileHandler:
             if not file.filename.lower().endswith('.csv'):
                 raise HTTPException(status_code=400, detail="File must be a CSV file")
             
-            # Read file content
-            content = await file.read()
-            
-            # Check file size
-            if len(content) > self.max_file_size:
+            # Check file size without reading the upload into memory
+            file.file.seek(0, os.SEEK_END)
+            file_size = file.file.tell()
+            file.file.seek(0)
+            if file_size > self.max_file_size:
                 raise HTTPException(
                     status_code=400, 
                     detail=f"File too large. Maximum size is {self.max_file_size / 1024 / 1024:.1f}MB"
                 )
             
-            # Decode content
-            try:
-                text_content = content.decode('utf-8')
-            except UnicodeDecodeError:
-                try:
-                    text_content = content.decode('latin-1')
-                except UnicodeDecodeError:
-                    raise HTTPException(status_code=400, detail="Unable to decode file. Please use UTF-8 encoding.")
-            
-            # Parse CSV
-            csv_reader = csv.DictReader(io.StringIO(text_content))
-            
-            # Validate headers
-            fieldnames = csv_reader.fieldnames
-            if not fieldnames or 'column' not in fieldnames or 'description' not in fieldnames:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="CSV must have 'column' and 'description' headers"
-                )
-            
-            # Process rows
-            column_descriptions = []
-            row_count = 0
-            
-            for row in csv_reader:
-                row_count += 1
-                
-                # Strip whitespace from column name and description
-                column_name = row.get('column', '').strip()
-                description = row.get('description', '').strip()
-                
-                if not column_name:
-                    logger.warning(f"Empty column name in row {row_count}, skipping")
-                    continue
-                
-                # Validate using Pydantic
-                try:
-                    validated_row = ColumnDescriptionUpload(
-                        column=column_name,
-                        description=description
-                    )
-                    
-                    column_descriptions.append(ColumnDescriptionItem(
-                        column_name=validated_row.column,
-                        description=validated_row.description
-                    ))
-                    
-                except Exception as e:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Invalid data in row {row_count}: {str(e)}"
-                    )
+            # Parse rows incrementally from the spooled upload, off the event loop
+            column_descriptions = await asyncio.to_thread(self._parse_column_descriptions_csv, file.file)
             
             if not column_descriptions:
                 raise HTTPException(status_code=400, detail="No valid column descriptions found in CSV")
@@ -99,22 +108,77 @@ class FileHandler:
             logger.error(f"Error processing CSV file: {e}")
             raise HTTPException(status_code=500, detail=f"Error processing CSV file: {str(e)}")
     
+    def _parse_column_descriptions_csv(self, stream) -> List[ColumnDescriptionItem]:
+        """Stream-parse a binary CSV, retrying as latin-1 if it is not UTF-8 (blocking)"""
+        for encoding in ('utf-8', 'latin-1'):
+            stream.seek(0)
+            text_stream = io.TextIOWrapper(stream, encoding=encoding, newline='')
+            try:
+                return self._read_column_descriptions(csv.DictReader(text_stream))
+            except UnicodeDecodeError:
+                continue
+            finally:
+                # Leave the underlying upload stream open
+                text_stream.detach()
+        
+        raise HTTPException(status_code=400, detail="Unable to decode file. Please use UTF-8 encoding.")
+    
+    def _read_column_descriptions(self, csv_reader: csv.DictReader) -> List[ColumnDescriptionItem]:
+        """Validate headers and rows of a column descriptions CSV"""
+        # Validate headers
+        fieldnames = csv_reader.fieldnames
+        if not fieldnames or 'column' not in fieldnames or 'description' not in fieldnames:
+            raise HTTPException(
+                status_code=400, 
+                detail="CSV must have 'column' and 'description' headers"
+            )
+        
+        # Process rows
+        column_descriptions = []
+        row_count = 0
+        
+        for row in csv_reader:
+            row_count += 1
+            
+            # Strip whitespace from column name and description
+            column_name = row.get('column', '').strip()
+            description = row.get('description', '').strip()
+            
+            if not column_name:
+                logger.warning(f"Empty column name in row {row_count}, skipping")
+                continue
+            
+            # Validate using Pydantic
+            try:
+                validated_row = ColumnDescriptionUpload(
+                    column=column_name,
+                    description=description
+                )
+                
+                column_descriptions.append(ColumnDescriptionItem(
+                    column_name=validated_row.column,
+                    description=validated_row.description
+                ))
+                
+            except Exception as e:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Invalid data in row {row_count}: {str(e)}"
+                )
+        
+        return column_descriptions
+    
     async def save_uploaded_file(self, file: UploadFile, connection_id: str) -> str:
         """Save uploaded file to connection directory"""
         try:
-            # Create connection upload directory
-            connection_dir = os.path.join(self.upload_dir, connection_id)
-            os.makedirs(connection_dir, exist_ok=True)
-            
             # Generate safe filename
+            connection_dir = os.path.join(self.upload_dir, connection_id)
             safe_filename = self._get_safe_filename(file.filename)
             file_path = os.path.join(connection_dir, safe_filename)
             
-            # Read and save file
+            # Read and save file off the event loop
             content = await file.read()
-            
-            with open(file_path, 'wb') as f:
-                f.write(content)
+            await asyncio.to_thread(self._write_file, connection_dir, file_path, content)
             
             logger.info(f"Saved uploaded file to {file_path}")
             return file_path
@@ -123,6 +187,12 @@ class FileHandler:
             logger.error(f"Error saving uploaded file: {e}")
             raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
     
+    def _write_file(self, directory: str, file_path: str, content: bytes):
+        """Create the directory and write file content (blocking)"""
+        os.makedirs(directory, exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(content)
+    
     def _get_safe_filename(self, filename: str) -> str:
         """Generate a safe filename"""
         import re
@@ -134,8 +204,8 @@ class FileHandler:
         # Remove unsafe characters
         safe_name = re.sub(r'[^a-zA-Z0-9._-]', '_', filename)
         
-        # Add timestamp to avoid conflicts
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        # Add timestamp to avoid conflicts; microseconds keep same-second uploads apart
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
         name, ext = os.path.splitext(safe_name)
         
         return f"{name}_{timestamp}{ext}"
@@ -162,16 +232,133 @@ class FileHandler:
                 "error": str(e)
             }
     
-    def cleanup_connection_files(self, connection_id: str):
-        """Clean up files for a connection"""
+    async def cleanup_connection_files(self, connection_id: str):
+        """Clean up files for a connection; only the rename is awaited"""
         try:
             connection_dir = os.path.join(self.upload_dir, connection_id)
             if os.path.exists(connection_dir):
-                import shutil
-                shutil.rmtree(connection_dir)
+                await self.discard_directory_async(connection_dir)
                 logger.info(f"Cleaned up files for connection {connection_id}")
         except Exception as e:
             logger.error(f"Error cleaning up files for connection {connection_id}: {e}")
+    
+    def discard_directory(self, path: str) -> None:
+        """Atomically move a directory aside and delete it in the background (blocks on busy retries)"""
+        self.remove_tree_in_background(self._move_aside(path))
+    
+    async def discard_directory_async(self, path: str) -> None:
+        """discard_directory for the event loop: the rename and its retries run in a worker thread"""
+        trash_path = await asyncio.to_thread(self._move_aside, path)
+        self.remove_tree_in_background(trash_path)
+    
+    def _move_aside(self, path: str) -> str:
+        """Rename a directory to a unique trash path, retrying while it is busy (blocking)"""
+        trash_path = f"{path}{self.TRASH_MARKER}{uuid.uuid4().hex}"
+        for delay in (*self.DISCARD_RETRY_DELAYS, None):
+            try:
+                os.rename(path, trash_path)
+                break
+            except OSError as e:
+                # Only a busy directory is worth waiting for; on Windows a file still open in
+                # it surfaces as EACCES, which on POSIX is a permanent permission error
+                transient = e.errno == errno.EBUSY or (os.name == 'nt' and e.errno == errno.EACCES)
+                if delay is None or not transient:
+                    raise
+                time.sleep(delay)
+        return trash_path
+    
+    def remove_tree_in_background(self, *paths: str) -> None:
+        """Delete directory trees in a worker thread, or inline when no event loop is running"""
+        if not paths:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to hand the deletion to
+            self.remove_tree(*paths)
+            return
+        
+        task = loop.create_task(asyncio.to_thread(self.remove_tree, *paths))
+        self._background_deletions.add(task)
+        task.add_done_callback(self._background_deletions.discard)
+    
+    def remove_tree(self, *paths: str) -> None:
+        """Delete directory trees, using one `rm -rf` process per batch of paths on POSIX (blocking)"""
+        if os.name != 'nt':
+            # rm walks and unlinks in C, far fewer Python-level syscalls than rmtree on large stores,
+            # and one process per batch pays fork+exec once for all of its paths
+            for start in range(0, len(paths), self.RM_BATCH_SIZE):
+                batch = paths[start:start + self.RM_BATCH_SIZE]
+                try:
+                    result = subprocess.run(['rm', '-rf', '--', *batch], capture_output=True)
+                    if result.returncode == 0:
+                        continue
+                    logger.warning(f"rm -rf failed for {len(batch)} path(s): {result.stderr.decode(errors='replace').strip()}")
+                except FileNotFoundError:
+                    logger.warning("rm is not available, removing directory trees from Python")
+                # Paths rm already removed are skipped by the Python fallback
+                for path in batch:
+                    self._remove_tree_parallel(path)
+            return
+        # NTFS serializes metadata updates, so parallel removal does not help on Windows
+        for path in paths:
+            shutil.rmtree(path, onerror=_retry_with_write_permission(path))
+    
+    def _remove_tree_parallel(self, path: str, max_workers: int = 8) -> None:
+        """Remove top-level subdirectories concurrently; unlink releases the GIL (blocking)"""
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    else:
+                        try:
+                            os.unlink(entry.path)
+                        except OSError:
+                            pass
+        except FileNotFoundError:
+            return
+        
+        # Subtrees may only adjust permissions inside the tree being removed, i.e. under path
+        on_error = _retry_with_write_permission(path)
+        if subdirs:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(subdirs))) as executor:
+                list(executor.map(lambda subdir: shutil.rmtree(subdir, onerror=on_error), subdirs))
+        
+        # Sweep up anything the parallel pass could not remove
+        shutil.rmtree(path, onerror=on_error)
+    
+    def iter_files(self, directory_path: str):
+        """Recursively yield file DirEntry objects; scandir joins paths and caches d_type (blocking)"""
+        try:
+            with os.scandir(directory_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            yield from self.iter_files(entry.path)
+                        else:
+                            yield entry
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+    
+    def sweep_discarded_directories(self, parent_dir: str) -> None:
+        """Schedule deletion of directories discard_directory left behind, e.g. across a restart"""
+        try:
+            with os.scandir(parent_dir) as entries:
+                leftovers = [
+                    entry.path for entry in entries
+                    if self.TRASH_MARKER in entry.name and entry.is_dir(follow_symlinks=False)
+                ]
+        except FileNotFoundError:
+            return
+        
+        # All leftovers go to one background `rm -rf` invocation
+        for leftover in leftovers:
+            logger.info(f"Removing leftover discarded directory: {leftover}")
+        self.remove_tree_in_background(*leftovers)
 
 # Global file handler instance
 file_handler = FileHandler()
\ No newline at end of file
@@ -1,4 +1,5 @@
 import json
+import time
 from typing import Dict, Any, Optional
 from datetime import datetime
 from app.models.sse_schemas import SSEEvent
@@ -66,10 +67,16 @@ def create_log_event_formatted(message: str, level: str = "info",
 class SSELogger:
     """Logger that sends logs via SSE"""
     
+    # Repeats of the last progress update (same percentage and message) within one frame (~60 fps) are dropped
+    PROGRESS_MIN_INTERVAL = 0.016
+    
     def __init__(self, sse_manager, task_id: str, source: str = "system"):
         self.sse_manager = sse_manager
         self.task_id = task_id
         self.source = source
+        self._last_progress = None
+        self._last_progress_message = None
+        self._last_progress_time = 0.0
     
     async def info(self, message: str):
         """Send info log"""
@@ -89,6 +96,18 @@ class SSELogger:
     
     async def progress(self, progress: int, message: str):
         """Send progress update"""
+        now = time.monotonic()
+        # Only exact repeats are throttled: a new message, a step back (phase reset) or 100%
+        # is always sent
+        if (progress < 100
+                and progress == self._last_progress
+                and message == self._last_progress_message
+                and now - self._last_progress_time < self.PROGRESS_MIN_INTERVAL):
+            return
+        self._last_progress = progress
+        self._last_progress_message = message
+        self._last_progress_time = now
+        
         await self.sse_manager.send_to_task(self.task_id, "progress", {
             "progress": progress,
             "message": message,